@@ -1 +1,2 @@
 # app/__init__.py
+from app import config  # noqa: F401 - carrega o .env antes dos outros módulos
@@ -0,0 +1,138 @@
+import csv
+import json
+import os
+from typing import AsyncIterator, List, Optional, Tuple, Union
+from fastapi import HTTPException, Request
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+# Linhas que um registro CSV pode ocupar (campos entre aspas com quebras de linha);
+# acima disso as aspas são tratadas como perdidas e a leitura segue na linha seguinte
+BULK_CSV_MAX_RECORD_LINES = int(os.getenv("BULK_CSV_MAX_RECORD_LINES", "100"))
+
+JSONL_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-lines")
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+
+Record = Tuple[int, Union[dict, str]]
+
+INVALID_UTF8 = "Invalid UTF-8"
+
+def _decode(line: bytes) -> Optional[str]:
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+
+async def iter_lines(request: Request) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """Gera (linha, texto); linhas que não são UTF-8 válido vêm como None."""
+    # Lê o corpo em blocos, sem carregá-lo inteiro na memória. O corte em b"\n"
+    # é seguro: em UTF-8 esse byte nunca faz parte de um caractere multibyte.
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, _decode(line)
+    if buffer:
+        yield line_number + 1, _decode(buffer)
+
+def _parse_csv_record(lines: List[str]) -> Tuple[Union[List[str], str, None], int]:
+    """Primeiro registro das linhas e quantas linhas ele ocupa.
+
+    None quando um campo entre aspas ainda não fechou; mensagem de erro quando o
+    registro é inválido (ocupa então só a primeira linha).
+    """
+    reader = csv.reader((line + "\n" for line in lines), strict=True)
+    try:
+        return next(reader), reader.line_num
+    except csv.Error as exc:
+        if "unexpected end of data" in str(exc):
+            return None, len(lines)
+        read = reader.line_num
+    # Aspas fora do lugar ("a" b): leitura tolerante, restrita às linhas que o modo estrito já leu
+    reader = csv.reader(line + "\n" for line in lines[:read])
+    try:
+        return next(reader), reader.line_num
+    except csv.Error as exc:
+        return f"Invalid CSV: {exc}", 1
+
+def _drain(pending: List[Tuple[int, str]], final: bool):
+    # Fecha os registros do início de pending; o que sobra é um registro ainda aberto
+    while pending:
+        if not pending[0][1].strip():
+            del pending[0]
+            continue
+        values, consumed = _parse_csv_record([line for _, line in pending])
+        if values is None:
+            if not final and len(pending) <= BULK_CSV_MAX_RECORD_LINES:
+                return
+            # Aspas que não fecham: só a linha inicial é descartada
+            values, consumed = "Unterminated quoted field", 1
+        yield pending[0][0], values
+        del pending[:consumed]
+
+async def iter_csv_rows(request: Request) -> AsyncIterator[Tuple[int, Union[List[str], str]]]:
+    """Gera (linha inicial, campos) por registro CSV; registros inválidos vêm como mensagem de erro.
+
+    Um campo entre aspas pode conter quebras de linha: as linhas se acumulam, até
+    BULK_CSV_MAX_RECORD_LINES, enquanto o csv.reader não consegue fechar o registro.
+    """
+    pending: List[Tuple[int, str]] = []
+    async for line_number, line in iter_lines(request):
+        if line is None:
+            for row in _drain(pending, final=True):
+                yield row
+            yield line_number, INVALID_UTF8
+            continue
+        pending.append((line_number, line))
+        for row in _drain(pending, final=False):
+            yield row
+    for row in _drain(pending, final=True):
+        yield row
+
+async def iter_records(request: Request) -> AsyncIterator[Record]:
+    """Gera (linha, registro) a partir de um corpo JSONL ou CSV; registros inválidos vêm como mensagem de erro."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in JSONL_CONTENT_TYPES:
+        async for line_number, line in iter_lines(request):
+            if line is None:
+                yield line_number, INVALID_UTF8
+                continue
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, "Invalid JSON"
+                continue
+            yield line_number, record if isinstance(record, dict) else "Each line must be a JSON object"
+    elif content_type in CSV_CONTENT_TYPES:
+        header = None
+        async for line_number, values in iter_csv_rows(request):
+            if header is None:
+                # Sem cabeçalho nenhuma linha pode ser lida; antes de qualquer lote gravado
+                if isinstance(values, str):
+                    raise HTTPException(status_code=400, detail=f"Invalid CSV header: {values}")
+                header = [name.strip() for name in values]
+                continue
+            if isinstance(values, str):
+                yield line_number, values
+                continue
+            if len(values) != len(header):
+                yield line_number, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            yield line_number, {name: value if value != "" else None for name, value in zip(header, values)}
+    else:
+        raise HTTPException(status_code=415, detail="Use application/x-ndjson or text/csv")
+
+async def chunked(records: AsyncIterator[Record], size: int = BULK_CHUNK_SIZE) -> AsyncIterator[List[Record]]:
+    chunk = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
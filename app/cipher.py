@@ -0,0 +1,160 @@
+import asyncio
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+from fastapi import HTTPException
+from app.metrics import observe_cipher
+
+if TYPE_CHECKING:
+    import httpx
+
+CIPHER_TIMEOUT = float(os.getenv("CIPHER_TIMEOUT", "5"))
+CIPHER_CONNECT_TIMEOUT = float(os.getenv("CIPHER_CONNECT_TIMEOUT", "2"))
+CIPHER_RETRIES = int(os.getenv("CIPHER_RETRIES", "2"))
+CIPHER_MAX_CONNECTIONS = int(os.getenv("CIPHER_MAX_CONNECTIONS", "20"))
+CIPHER_KEEPALIVE_SECONDS = float(os.getenv("CIPHER_KEEPALIVE_SECONDS", "30"))
+CIPHER_BREAKER_THRESHOLD = int(os.getenv("CIPHER_BREAKER_THRESHOLD", "5"))
+CIPHER_BREAKER_RESET_SECONDS = float(os.getenv("CIPHER_BREAKER_RESET_SECONDS", "30"))
+CIPHER_BATCH_CONCURRENCY = int(os.getenv("CIPHER_BATCH_CONCURRENCY", "10"))
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    """Abre após falhas consecutivas e libera uma tentativa de teste depois do tempo de espera."""
+
+    def __init__(self, failure_threshold: int = CIPHER_BREAKER_THRESHOLD, reset_timeout: float = CIPHER_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError()
+            # Meio aberto: deixa passar esta chamada e volta a abrir se ela falhar
+            self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class CipherClient:
+    """Clientes HTTP compartilhados (síncrono e assíncrono) para o serviço de criptografia."""
+
+    # httpx (e o que ele importa) custa ~150 ms no import; só é carregado
+    # quando o serviço é chamado pela primeira vez.
+    def __init__(self, transport: Optional["httpx.BaseTransport"] = None, async_transport: Optional["httpx.AsyncBaseTransport"] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self._transport = transport
+        self._async_transport = async_transport
+        self.breaker = breaker or CircuitBreaker()
+        self._client: Optional["httpx.Client"] = None
+        self._async_client: Optional["httpx.AsyncClient"] = None
+        self._lock = threading.Lock()
+
+    def _client_options(self) -> dict:
+        import httpx
+        return {
+            "timeout": httpx.Timeout(CIPHER_TIMEOUT, connect=CIPHER_CONNECT_TIMEOUT),
+            "limits": httpx.Limits(
+                max_connections=CIPHER_MAX_CONNECTIONS,
+                max_keepalive_connections=CIPHER_MAX_CONNECTIONS,
+                keepalive_expiry=CIPHER_KEEPALIVE_SECONDS,
+            ),
+        }
+
+    @property
+    def client(self) -> "httpx.Client":
+        import httpx
+        with self._lock:
+            if self._client is None:
+                transport = self._transport or httpx.HTTPTransport(retries=CIPHER_RETRIES)
+                self._client = httpx.Client(transport=transport, **self._client_options())
+            return self._client
+
+    @property
+    def async_client(self) -> "httpx.AsyncClient":
+        import httpx
+        if self._async_client is None:
+            transport = self._async_transport or httpx.AsyncHTTPTransport(retries=CIPHER_RETRIES)
+            self._async_client = httpx.AsyncClient(transport=transport, **self._client_options())
+        return self._async_client
+
+    def _check_breaker(self):
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            raise HTTPException(status_code=503, detail="Cipher service unavailable")
+
+    def _handle(self, url: str, started: float, response: Optional["httpx.Response"], error_detail: str) -> dict:
+        outcome = "unreachable" if response is None else str(response.status_code)
+        observe_cipher(url, outcome, time.perf_counter() - started)
+        if response is None or response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if response is None or response.status_code != 200:
+            raise HTTPException(status_code=500, detail=error_detail)
+        return response.json()
+
+    def post(self, url: str, payload: dict, error_detail: str) -> dict:
+        import httpx
+        self._check_breaker()
+        started = time.perf_counter()
+        try:
+            response = self.client.post(url, json=payload)
+        except httpx.HTTPError:
+            response = None
+        return self._handle(url, started, response, error_detail)
+
+    async def apost(self, url: str, payload: dict, error_detail: str) -> dict:
+        import httpx
+        self._check_breaker()
+        started = time.perf_counter()
+        try:
+            response = await self.async_client.post(url, json=payload)
+        except httpx.HTTPError:
+            response = None
+        return self._handle(url, started, response, error_detail)
+
+    async def apost_many(self, url: str, payloads: list, error_detail: str) -> list:
+        # O serviço de criptografia não tem rota em lote: as chamadas são
+        # disparadas em paralelo sobre as mesmas conexões keep-alive.
+        semaphore = asyncio.Semaphore(CIPHER_BATCH_CONCURRENCY)
+
+        async def call(payload: dict) -> dict:
+            async with semaphore:
+                return await self.apost(url, payload, error_detail)
+
+        return await asyncio.gather(*(call(payload) for payload in payloads))
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
+
+client = CipherClient()
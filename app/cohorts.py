@@ -0,0 +1,131 @@
+import os
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import Date, bindparam, case, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.formModel import Form
+from app.models.userModel import User
+
+COHORT_METRICS = (
+    "bmi", "weight", "height", "abdominal_circumference",
+    "latest_red_blood_cell", "latest_hemoglobin", "latest_hematocrit", "latest_glycated_hemoglobin",
+    "latest_ast", "latest_alt", "latest_urea", "latest_creatinine",
+)
+# Limite inferior de cada faixa etária; a última é aberta
+AGE_BANDS = (0, 18, 30, 40, 50, 60, 70)
+PERCENTILES = (25, 50, 75, 95)
+COHORT_BATCH_SIZE = int(os.getenv("COHORT_BATCH_SIZE", "10000"))
+
+def age_band_labels() -> List[str]:
+    bounds = list(AGE_BANDS[1:])
+    labels = [f"{lower}-{upper - 1}" for lower, upper in zip(AGE_BANDS, bounds)]
+    return labels + [f"{AGE_BANDS[-1]}+"]
+
+def _latest_forms():
+    # Um formulário por usuário: o mais recente
+    return select(func.max(Form.id)).group_by(Form.user_id)
+
+def _classifiable():
+    # Sem sexo ou nascimento não há grupo (e NaT quebraria o cálculo da idade no NumPy)
+    return User.biological_sex.isnot(None), User.birth_date.isnot(None)
+
+def _group(sex: str, band: int, forms: int, metrics: Dict[str, dict]) -> dict:
+    return {"biological_sex": sex, "age_band": age_band_labels()[band], "forms": forms, "metrics": metrics}
+
+def _stats(count: int, mean, percentiles: Sequence) -> dict:
+    def rounded(value):
+        return None if value is None or not count else round(float(value), 3)
+
+    return {
+        "count": int(count), "mean": rounded(mean),
+        **{f"p{percentile}": rounded(value) for percentile, value in zip(PERCENTILES, percentiles)},
+    }
+
+def sql_statement(metrics: Sequence[str]):
+    """Agregação inteira no Postgres: um SELECT com percentile_cont por métrica e grupo."""
+    age = func.date_part("year", func.age(bindparam("today", type_=Date), User.birth_date))
+    band = case(
+        *((age < upper, index) for index, upper in enumerate(AGE_BANDS[1:])), else_=len(AGE_BANDS) - 1
+    ).label("age_band")
+    columns = []
+    for name in metrics:
+        column = getattr(Form, name)
+        columns += [func.count(column).label(f"{name}_count"), func.avg(column).label(f"{name}_mean")]
+        columns += [
+            func.percentile_cont(percentile / 100).within_group(column).label(f"{name}_p{percentile}")
+            for percentile in PERCENTILES
+        ]
+    return (
+        select(User.biological_sex, band, func.count().label("forms"), *columns)
+        .select_from(Form).join(User, User.id == Form.user_id)
+        .where(Form.id.in_(_latest_forms()), *_classifiable())
+        # Agrupa pelo nome da coluna de saída em vez de repetir o CASE
+        .group_by(User.biological_sex, literal_column("age_band"))
+        .order_by(User.biological_sex, literal_column("age_band"))
+    )
+
+async def _sql_statistics(db: AsyncSession, metrics: Sequence[str], today: date) -> List[dict]:
+    rows = (await db.execute(sql_statement(metrics), {"today": today})).mappings()
+    return [
+        _group(row["biological_sex"], int(row["age_band"]), row["forms"], {
+            name: _stats(row[f"{name}_count"], row[f"{name}_mean"],
+                         [row[f"{name}_p{percentile}"] for percentile in PERCENTILES])
+            for name in metrics
+        })
+        for row in rows
+    ]
+
+def _ages(birth_dates, today: date):
+    import numpy as np
+
+    births = np.array(birth_dates, dtype="datetime64[D]")
+    years = births.astype("datetime64[Y]").astype(int) + 1970
+    months = births.astype("datetime64[M]").astype(int) % 12 + 1
+    days = (births - births.astype("datetime64[M]")).astype(int) + 1
+    had_birthday = (months < today.month) | ((months == today.month) & (days <= today.day))
+    return today.year - years - (~had_birthday)
+
+async def _numpy_statistics(db: AsyncSession, metrics: Sequence[str], today: date) -> List[dict]:
+    """Sem percentile_cont no banco: as colunas chegam em lotes e são agregadas com NumPy."""
+    import numpy as np
+
+    statement = (
+        select(User.biological_sex, User.birth_date, *(getattr(Form, name) for name in metrics))
+        .select_from(Form).join(User, User.id == Form.user_id)
+        .where(Form.id.in_(_latest_forms()), *_classifiable())
+    )
+    sexes, bands, values = [], [], {name: [] for name in metrics}
+    result = await db.stream(statement.execution_options(yield_per=COHORT_BATCH_SIZE))
+    async for batch in result.partitions():
+        columns = list(zip(*batch))
+        sexes.append(np.array(columns[0]))
+        bands.append(np.searchsorted(AGE_BANDS, _ages(columns[1], today), side="right") - 1)
+        for name, column in zip(metrics, columns[2:]):
+            # None vira NaN e fica fora das contas
+            values[name].append(np.array(column, dtype=float))
+    if not sexes:
+        return []
+
+    sexes, bands = np.concatenate(sexes), np.clip(np.concatenate(bands), 0, None)
+    values = {name: np.concatenate(chunks) for name, chunks in values.items()}
+    groups = []
+    for sex in np.unique(sexes):
+        for band in np.unique(bands[sexes == sex]):
+            mask = (sexes == sex) & (bands == band)
+            metric_stats = {}
+            for name in metrics:
+                present = values[name][mask]
+                present = present[~np.isnan(present)]
+                if present.size:
+                    metric_stats[name] = _stats(present.size, present.mean(), np.percentile(present, PERCENTILES))
+                else:
+                    metric_stats[name] = _stats(0, None, [None] * len(PERCENTILES))
+            groups.append(_group(str(sex), int(band), int(mask.sum()), metric_stats))
+    return groups
+
+async def cohort_statistics(db: AsyncSession, metrics: Sequence[str] = COHORT_METRICS, today: Optional[date] = None) -> List[dict]:
+    """Média e percentis das métricas do formulário mais recente de cada usuário, por sexo e faixa etária."""
+    today = today or date.today()
+    if db.get_bind().dialect.name == "postgresql":
+        return await _sql_statistics(db, metrics, today)
+    return await _numpy_statistics(db, metrics, today)
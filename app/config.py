@@ -0,0 +1,49 @@
+"""Configuração da aplicação, em duas partes de propósito.
+
+- Settings (get_settings): URLs e credenciais sem valor padrão (banco, e-mail,
+  SECRET_KEY, FRONTEND_URL). Lidas e validadas na subida (lifespan), nunca no
+  import, para que importar a aplicação não dependa delas.
+- Ajustes com valor padrão (CACHE_*, SMTP_*, OUTBOX_*, PASSWORD_*, CIPHER_*,
+  DB_REPLICA_*, RATE_LIMIT_*, BULK_* etc.): constantes de módulo lidas do
+  ambiente no import, ao lado do código que as usa. Testes e benchmarks as
+  trocam com monkeypatch; nenhuma delas abre conexões ou exige dependências
+  opcionais no import.
+
+O .env é carregado aqui, no import; app/__init__.py importa este módulo antes
+de qualquer outro para que as constantes também o enxerguem.
+"""
+import os
+from functools import lru_cache
+from typing import Optional
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+load_dotenv()
+
+class Settings(BaseModel):
+    """Configuração lida do ambiente (e do .env) uma única vez por processo."""
+
+    database_url: Optional[str] = None
+    async_database_url: Optional[str] = None
+    # Réplicas de leitura, separadas por vírgula (opcional)
+    database_read_urls: Optional[str] = None
+    db_pool_warmup: int = 0
+    mail_username: Optional[str] = None
+    mail_password: Optional[str] = None
+    secret_key: Optional[str] = None
+    algorithm: Optional[str] = None
+    frontend_url: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        values = {name: os.getenv(name.upper()) for name in cls.model_fields}
+        return cls(**{name: value for name, value in values.items() if value is not None})
+
+    def require(self, *names: str):
+        missing = [name.upper() for name in names if not getattr(self, name)]
+        if missing:
+            raise ValueError(f"{' and '.join(missing)} must be set in the environment")
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    return Settings.from_env()
@@ -1,23 +1,186 @@
-from sqlalchemy import create_engine
+import asyncio
+from functools import lru_cache
+from typing import List, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app import metrics
+from app.replicas import ReplicaSet, RoutingSession
+from app.config import get_settings
 import os
 
-load_dotenv()
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+def to_async_url(url: str) -> URL:
+    parsed = make_url(url)
+    if parsed.get_dialect().is_async:
+        return parsed
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Não há driver assíncrono configurado para o banco '{backend}'.")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend])
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL não encontrada. Verifique o arquivo .env.")
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def engine_options(url: URL) -> dict:
+    backend = url.get_backend_name()
+    options = {
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+    if backend != "sqlite":
+        options["pool_size"] = int(os.getenv("DB_POOL_SIZE", "10"))
+        options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        options["pool_timeout"] = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        options["poolclass"] = metrics.timed_pool_class(AsyncAdaptedQueuePool if url.get_dialect().is_async else QueuePool)
+
+    statement_timeout = os.getenv("DB_STATEMENT_TIMEOUT_MS")
+    if statement_timeout and backend == "postgresql":
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": statement_timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
+def database_url() -> str:
+    url = get_settings().database_url
+    if not url:
+        raise ValueError("DATABASE_URL não encontrada. Verifique o arquivo .env.")
+    return url
+
+def async_database_url() -> URL:
+    return make_url(get_settings().async_database_url or to_async_url(database_url()))
+
+# Os engines são criados no primeiro uso (normalmente no lifespan da aplicação),
+# e não no import. O engine síncrono fica disponível para scripts e migrações;
+# as rotas usam o engine assíncrono através de get_db.
+@lru_cache(maxsize=None)
+def get_engine() -> Engine:
+    engine = create_engine(database_url(), **engine_options(make_url(database_url())))
+    metrics.track_engine("sync", engine)
+    return engine
+
+@lru_cache(maxsize=None)
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    url = async_database_url()
+    engine = create_async_engine(url, **engine_options(url))
+    metrics.track_engine("async", engine)
+    return engine
+
+@lru_cache(maxsize=None)
+def get_async_sessionmaker() -> async_sessionmaker:
+    return async_sessionmaker(get_async_engine(), class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+def database_read_urls() -> List[str]:
+    urls = get_settings().database_read_urls or ""
+    return [url.strip() for url in urls.split(",") if url.strip()]
+
+@lru_cache(maxsize=None)
+def get_replica_set() -> Optional[ReplicaSet]:
+    urls = [to_async_url(url) for url in database_read_urls()]
+    if not urls:
+        return None
+    replicas = ReplicaSet([create_async_engine(url, **engine_options(url)) for url in urls])
+    for replica in replicas.replicas:
+        metrics.track_engine(replica.name, replica.engine)
+    return replicas
+
+@lru_cache(maxsize=None)
+def get_read_sessionmaker() -> async_sessionmaker:
+    # Sem DATABASE_READ_URLS as rotas de leitura usam a mesma sessão das demais
+    replicas = get_replica_set()
+    if replicas is None:
+        return get_async_sessionmaker()
+    return async_sessionmaker(
+        get_async_engine(), class_=AsyncSession, sync_session_class=RoutingSession, replicas=replicas,
+        autoflush=False, expire_on_commit=False,
+    )
+
+def reset_engines():
+    """Esquece os engines criados até aqui para que o processo crie os seus no próximo uso.
+
+    Usado após um fork (app.server): o filho herda os sockets do pool do pai, e
+    dispose(close=False) os abandona sem fechar as conexões que o pai ainda usa.
+    """
+    if get_engine.cache_info().currsize:
+        get_engine().dispose(close=False)
+    if get_async_engine.cache_info().currsize:
+        get_async_engine().sync_engine.dispose(close=False)
+    if get_replica_set.cache_info().currsize and get_replica_set() is not None:
+        for replica in get_replica_set().replicas:
+            replica.engine.sync_engine.dispose(close=False)
+    for factory in (get_engine, get_sessionmaker, get_async_engine, get_async_sessionmaker,
+                    get_replica_set, get_read_sessionmaker):
+        factory.cache_clear()
+
+_LAZY_ATTRIBUTES = {
+    "DATABASE_URL": database_url,
+    "ASYNC_DATABASE_URL": async_database_url,
+    "engine": get_engine,
+    "SessionLocal": get_sessionmaker,
+    "async_engine": get_async_engine,
+    "AsyncSessionLocal": get_async_sessionmaker,
+}
+
+def __getattr__(name: str):
+    # Mantém `from app.database import engine` funcionando sem criar nada no import
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+async def warm_up_pool(connections: int):
+    """Abre até `connections` conexões em paralelo para que as primeiras requisições não paguem o connect."""
+    pool = get_async_engine().pool
+    # Pools sem tamanho (NullPool) não guardam conexões; conexões além do
+    # pool_size são descartadas ao voltar, então não adianta abri-las.
+    connections = min(connections, pool.size()) if hasattr(pool, "size") else 0
+    if connections <= 0:
+        return 0
+
+    async def checkout():
+        async with get_async_engine().connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            # Segura a conexão até todas abrirem, senão o pool reaproveita a mesma
+            await barrier.wait()
+
+    barrier = asyncio.Barrier(connections)
+    await asyncio.gather(*(checkout() for _ in range(connections)))
+    return connections
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+INSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def insert_for(db, model):
+    # INSERT com ON CONFLICT do dialeto em uso (Postgres em produção, SQLite nos testes)
+    dialect = db.get_bind().dialect.name
+    if dialect not in INSERT_DIALECTS:
+        raise ValueError(f"ON CONFLICT não suportado para o banco '{dialect}'.")
+    return INSERT_DIALECTS[dialect](model)
+
+async def get_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+async def get_read_db():
+    """Sessão das rotas somente leitura: lê de uma réplica quando DATABASE_READ_URLS está definida."""
+    async with get_read_sessionmaker()() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,55 @@
+import hashlib
+import json
+from typing import Any, Iterable
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+
+def compute_etag(data: Any) -> str:
+    body = json.dumps(jsonable_encoder(data), sort_keys=True, separators=(",", ":"))
+    return '"{0}"'.format(hashlib.sha256(body.encode()).hexdigest()[:32])
+
+def _parse_tags(header: str) -> list:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+def etag_response(request: Request, response: Response, data: Any):
+    """Devolve 304 quando o cliente já tem a versão atual; senão anexa o ETag e devolve os dados."""
+    etag = compute_etag(data)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match usa comparação fraca
+        tags = [tag.removeprefix("W/") for tag in _parse_tags(if_none_match)]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return data
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(status_code=412, detail="Resource has been modified")
+
+def check_if_match(request: Request, current_data: Any) -> bool:
+    """Levanta 412 quando o If-Match não casa; devolve True quando a escrita depende da versão lida."""
+    if_match = request.headers.get("if-match")
+    if if_match is None:
+        return False
+    tags = _parse_tags(if_match)
+    if "*" in tags:
+        return False
+    # If-Match usa comparação forte: ETags fracas nunca coincidem
+    if compute_etag(current_data) not in tags:
+        raise precondition_failed()
+    return True
+
+def unchanged(model, instance, fields: Iterable[str]) -> list:
+    """Condições de um UPDATE que só vale se as colunas do ETag ainda tiverem os valores lidos.
+
+    A comparação do If-Match acontece sobre uma leitura sem lock; sem essas
+    condições, duas escritas com o mesmo ETag passariam e a segunda apagaria a primeira.
+    Chave primária e colunas preenchidas pelo banco na inserção (creation_date)
+    não mudam e ficam de fora (o texto gravado pelo SQLite nem casaria com o datetime lido).
+    """
+    columns = model.__table__.columns
+    return [
+        columns[name].is_not_distinct_from(getattr(instance, name))
+        for name in fields
+        if name in columns and not columns[name].primary_key and columns[name].server_default is None
+    ]
@@ -0,0 +1,67 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from passlib.context import CryptContext
+from passlib.exc import MissingBackendError
+
+PASSWORD_SCHEMES = [scheme.strip() for scheme in os.getenv("PASSWORD_SCHEMES", "bcrypt").split(",") if scheme.strip()]
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "3"))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", "65536"))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", "1"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS") or os.cpu_count() or 1)
+
+def build_context(schemes: List[str] = PASSWORD_SCHEMES, bcrypt_rounds: int = PASSWORD_BCRYPT_ROUNDS,
+                  argon2_time_cost: int = PASSWORD_ARGON2_TIME_COST, argon2_memory_cost: int = PASSWORD_ARGON2_MEMORY_COST,
+                  argon2_parallelism: int = PASSWORD_ARGON2_PARALLELISM) -> CryptContext:
+    # O primeiro esquema é usado para novos hashes; os demais só são verificados
+    # e marcados para rehash (deprecated="auto").
+    context = CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+    try:
+        context.handler().get_backend()
+    except MissingBackendError:
+        raise ValueError(f"O esquema de senha '{schemes[0]}' não está disponível. Instale a dependência correspondente.")
+    return context
+
+# Criado no primeiro uso (a aplicação o cria na subida), não no import: um esquema
+# sem backend instalado não impede importar a aplicação, as migrações ou os testes
+context: Optional[CryptContext] = None
+
+def get_context() -> CryptContext:
+    global context
+    if context is None:
+        context = build_context()
+    return context
+
+# bcrypt e argon2 liberam o GIL, então um pool de threads usa todos os núcleos
+# sem bloquear o event loop.
+executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+def is_hashed(stored_password: str) -> bool:
+    return get_context().identify(stored_password, required=False) is not None
+
+def hash_password(password: str) -> str:
+    return get_context().hash(password)
+
+def verify_and_update(password: str, stored_hash: str) -> Tuple[bool, Optional[str]]:
+    return get_context().verify_and_update(password, stored_hash)
+
+async def _run(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+async def verify_and_update_async(password: str, stored_hash: str) -> Tuple[bool, Optional[str]]:
+    return await _run(verify_and_update, password, stored_hash)
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    return await asyncio.gather(*(hash_password_async(password) for password in passwords))
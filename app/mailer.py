@@ -0,0 +1,225 @@
+import asyncio
+import email.message
+import logging
+import os
+import smtplib
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.config import get_settings
+from app.database import insert_for
+from app.metrics import EMAIL_DELIVERY_DELAY, SMTP_SEND_LATENCY
+from app.models.emailOutboxModel import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").strip().lower() in ("1", "true", "yes", "on")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_BASE_SECONDS = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "30"))
+# Janela em que um e-mail já enviado com a mesma dedupe_key ainda coalesce novos pedidos
+OUTBOX_DEDUPE_WINDOW_SECONDS = float(os.getenv("OUTBOX_DEDUPE_WINDOW_SECONDS", "300"))
+
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+async def has_recent_email(db: AsyncSession, dedupe_key: str, window_seconds: float = OUTBOX_DEDUPE_WINDOW_SECONDS) -> bool:
+    """Existe um e-mail com esta chave ainda pendente ou criado dentro da janela?"""
+    cutoff = datetime.utcnow() - timedelta(seconds=window_seconds)
+    return (await db.execute(
+        select(EmailOutbox.id).where(
+            EmailOutbox.dedupe_key == dedupe_key,
+            or_(EmailOutbox.status == STATUS_PENDING, EmailOutbox.created_at >= cutoff)
+        ).limit(1)
+    )).first() is not None
+
+async def enqueue_unique_email(db: AsyncSession, dedupe_key: str, recipient: str, subject: str, html: str) -> bool:
+    """Enfileira o e-mail a menos que já haja um pendente com a mesma chave; devolve False quando coalescido.
+
+    O índice único parcial resolve a corrida entre pedidos simultâneos. O predicado
+    vai como texto literal: com parâmetro ($1 no asyncpg) o Postgres não reconhece
+    o índice parcial como árbitro do ON CONFLICT.
+    """
+    statement = insert_for(db, EmailOutbox).values(
+        recipient=recipient, subject=subject, body=html, dedupe_key=dedupe_key
+    ).on_conflict_do_nothing(
+        index_elements=["dedupe_key"], index_where=text(f"status = '{STATUS_PENDING}'")
+    ).returning(EmailOutbox.id)
+    return (await db.execute(statement)).first() is not None
+
+def build_message(sender: str, db_email: EmailOutbox) -> email.message.Message:
+    message = email.message.Message()
+    message["Subject"] = db_email.subject
+    message["From"] = sender
+    message["To"] = db_email.recipient
+    message.add_header("Content-Type", "text/html")
+    message.set_payload(db_email.body)
+    return message
+
+class SMTPSender:
+    """Mantém uma conexão SMTP aberta e a reutiliza entre os envios."""
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = True, timeout: float = 30, idle_timeout: float = 60):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._connection: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    def _get_connection(self) -> smtplib.SMTP:
+        if self._connection is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+        if self._connection is None:
+            self._connection = self._connect()
+        return self._connection
+
+    def send(self, from_address: str, to_address: str, message: email.message.Message):
+        payload = message.as_string().encode("utf-8")
+        try:
+            self._get_connection().sendmail(from_address, to_address, payload)
+        except smtplib.SMTPServerDisconnected:
+            # O servidor pode ter encerrado a conexão ociosa; tenta uma nova uma vez
+            self._connection = None
+            self._get_connection().sendmail(from_address, to_address, payload)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._connection = None
+
+class OutboxDispatcher:
+    """Envia os e-mails pendentes do outbox em lotes, com novas tentativas e backoff exponencial."""
+
+    def __init__(self, session_factory: async_sessionmaker, sender: SMTPSender, from_address: str,
+                 batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_INTERVAL,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS, retry_base_seconds: float = OUTBOX_RETRY_BASE_SECONDS):
+        self.session_factory = session_factory
+        self.sender = sender
+        self.from_address = from_address
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _send_batch(self, batch: List[EmailOutbox]) -> List[Optional[str]]:
+        errors = []
+        for db_email in batch:
+            started = time.perf_counter()
+            try:
+                self.sender.send(self.from_address, db_email.recipient, build_message(self.from_address, db_email))
+                errors.append(None)
+                SMTP_SEND_LATENCY.labels("ok").observe(time.perf_counter() - started)
+            except (smtplib.SMTPException, OSError) as exc:
+                SMTP_SEND_LATENCY.labels("error").observe(time.perf_counter() - started)
+                self.sender.close()
+                errors.append(repr(exc))
+        return errors
+
+    async def dispatch_once(self) -> int:
+        async with self.session_factory() as db:
+            # SKIP LOCKED evita que dois workers enviem o mesmo e-mail no Postgres
+            batch = (await db.execute(
+                select(EmailOutbox).where(
+                    EmailOutbox.status == STATUS_PENDING,
+                    EmailOutbox.next_attempt_at <= datetime.utcnow()
+                ).order_by(EmailOutbox.id).limit(self.batch_size).with_for_update(skip_locked=True)
+            )).scalars().all()
+            if not batch:
+                return 0
+
+            errors = await asyncio.to_thread(self._send_batch, batch)
+
+            now = datetime.utcnow()
+            for db_email, error in zip(batch, errors):
+                db_email.attempts += 1
+                if error is None:
+                    db_email.status = STATUS_SENT
+                    db_email.sent_at = now
+                    db_email.last_error = None
+                    EMAIL_DELIVERY_DELAY.observe((now - db_email.created_at).total_seconds())
+                elif db_email.attempts >= self.max_attempts:
+                    db_email.status = STATUS_FAILED
+                    db_email.last_error = error[:1024]
+                else:
+                    delay = self.retry_base_seconds * 2 ** (db_email.attempts - 1)
+                    db_email.next_attempt_at = now + timedelta(seconds=delay)
+                    db_email.last_error = error[:1024]
+            await db.commit()
+            return len(batch)
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def run(self):
+        while True:
+            try:
+                sent = await self.dispatch_once()
+            except Exception:
+                logger.exception("Falha ao processar o outbox de e-mails")
+                sent = 0
+            if sent >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.sender.close)
+
+dispatcher: Optional[OutboxDispatcher] = None
+
+def create_dispatcher(session_factory: async_sessionmaker) -> OutboxDispatcher:
+    global dispatcher
+    # As credenciais só são exigidas quando o dispatcher sobe, não no import
+    settings = get_settings()
+    settings.require("mail_username", "mail_password")
+    sender = SMTPSender(SMTP_HOST, SMTP_PORT, settings.mail_username, settings.mail_password,
+                        starttls=SMTP_STARTTLS, timeout=SMTP_TIMEOUT, idle_timeout=SMTP_IDLE_TIMEOUT)
+    dispatcher = OutboxDispatcher(session_factory, sender, settings.mail_username)
+    return dispatcher
+
+def notify_dispatcher():
+    if dispatcher is not None:
+        dispatcher.notify()
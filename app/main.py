@@ -1,14 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from sqlalchemy.exc import IntegrityError
 from . import database
-from .database import Base
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import doctor, user, dependent
+from .routers import doctor, user, dependent, form
+from . import cipher, hashing, mailer
+from .config import get_settings
+from .cache import user_cache
+from .metrics import MetricsMiddleware, metrics_response
+from .profiler import SQL_PROFILE, QueryProfilerMiddleware
 
-Base.metadata.create_all(bind=database.engine)
+# O esquema é gerenciado pelo Alembic (`alembic upgrade head`); a aplicação
+# não executa DDL ao iniciar.
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Configuração, engine e credenciais são validados aqui, não no import
+    settings = get_settings()
+    hashing.get_context()
+    session_factory = database.get_async_sessionmaker()
+    if settings.db_pool_warmup:
+        await database.warm_up_pool(settings.db_pool_warmup)
+    replicas = database.get_replica_set()
+    if replicas is not None:
+        await replicas.start()
+    dispatcher = mailer.create_dispatcher(session_factory)
+    dispatcher.start()
+    yield
+    await dispatcher.stop()
+    await cipher.client.aclose()
+    await database.get_async_engine().dispose()
+    if replicas is not None:
+        await replicas.stop()
+
+# Respostas montadas pelo FastAPI a partir do response_model são codificadas
+# com orjson; as listagens grandes serializam direto para bytes (app.serialization).
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = [
     "http://localhost:5173",
@@ -21,17 +49,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Rotas de serviço
 app.include_router(user.router)
 app.include_router(doctor.router)
 app.include_router(dependent.router)
+app.include_router(form.router)
+
+app.add_middleware(MetricsMiddleware, routers={
+    router.prefix: router.tags[0] for router in (user.router, doctor.router, dependent.router, form.router)
+})
+
+# Perfil SQL por requisição (cabeçalhos X-DB-* e log); desligado por padrão
+if SQL_PROFILE:
+    app.add_middleware(QueryProfilerMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return metrics_response()
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Usuarios API"}
 
+@app.get("/cache/stats")
+def read_cache_stats():
+    return user_cache.stats()
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     return JSONResponse(
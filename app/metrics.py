@@ -0,0 +1,155 @@
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Duração das requisições HTTP",
+    ["router", "method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requisições em andamento", ["router"], multiprocess_mode="livesum")
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Duração de cada comando SQL", ["statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "Comandos SQL executados por requisição", ["router"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram("db_time_per_request_seconds", "Tempo de banco somado por requisição", ["router"])
+DB_POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds", "Tempo para obter uma conexão do pool (espera + connect)",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Tamanho configurado do pool", ["engine"])
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Conexões em uso", ["engine"])
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Conexões abertas além do pool_size", ["engine"])
+
+CIPHER_LATENCY = Histogram("cipher_request_duration_seconds", "Latência do serviço de criptografia", ["endpoint", "outcome"])
+SMTP_SEND_LATENCY = Histogram("smtp_send_duration_seconds", "Latência do envio de um e-mail via SMTP", ["outcome"])
+EMAIL_DELIVERY_DELAY = Histogram(
+    "email_delivery_delay_seconds", "Tempo entre a entrada no outbox e o envio",
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+)
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def _statement_kind(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+# Os listeners valem para todos os engines (inclusive o sync_engine por trás
+# do engine assíncrono); o contexto da requisição chega via ContextVar.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+    DB_QUERY_DURATION.labels(_statement_kind(statement)).observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+@lru_cache(maxsize=None)
+def timed_pool_class(pool_class):
+    """Subclasse do pool que mede quanto tempo cada checkout leva."""
+    class TimedPool(pool_class):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                return super().connect()
+            finally:
+                DB_POOL_CHECKOUT.observe(time.perf_counter() - started)
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+def track_engine(name: str, engine):
+    def pool_stat(method: str):
+        # Lê engine.pool a cada coleta: dispose() troca o objeto do pool
+        return lambda: float(getattr(engine.pool, method, lambda: 0)())
+
+    DB_POOL_SIZE.labels(name).set_function(pool_stat("size"))
+    DB_POOL_CHECKED_OUT.labels(name).set_function(pool_stat("checkedout"))
+    DB_POOL_OVERFLOW.labels(name).set_function(pool_stat("overflow"))
+
+def observe_cipher(url: str, outcome: str, seconds: float):
+    CIPHER_LATENCY.labels(urlsplit(url).path or "/", outcome).observe(seconds)
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede latência, requisições em andamento e uso do banco por router."""
+
+    def __init__(self, app, routers: Dict[str, str]):
+        self.app = app
+        # Prefixos mais longos primeiro, para que o mais específico vença
+        self.routers = sorted(routers.items(), key=lambda item: -len(item[0]))
+
+    def _router_for(self, path: str) -> str:
+        for prefix, name in self.routers:
+            if path == prefix or path.startswith(prefix + "/"):
+                return name
+        return "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        router = self._router_for(scope["path"])
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        in_flight = REQUESTS_IN_FLIGHT.labels(router)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            _request_stats.reset(token)
+            # O template da rota (ex.: /user/users/{user_id}) evita um rótulo por id
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.labels(router, scope["method"], route_path, str(status)).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(router).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(router).observe(stats.db_seconds)
+
+def metrics_registry():
+    """Com PROMETHEUS_MULTIPROC_DIR (vários workers, ver app.server), agrega os arquivos de todos os processos.
+
+    As métricas do pool (set_function) não são gravadas nesses arquivos e
+    aparecem zeradas nesse modo; o histograma de checkout continua valendo.
+    """
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    from prometheus_client import multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+def metrics_response() -> Response:
+    return Response(generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -6,8 +6,16 @@ class Dependent(Base):
     __tablename__ = "Dependents"
 
     user_id = Column(Integer, ForeignKey("Users.id"), primary_key=True)
-    dependent_id = Column(Integer, ForeignKey("Users.id"), primary_key=True)
+    dependent_id = Column(Integer, ForeignKey("Users.id"), primary_key=True, index=True)
     confirmed = Column(Boolean, default=False)
 
+    # Índice parcial para read_user_dependents: só os vínculos confirmados
+    __table_args__ = (
+        Index(
+            "ix_Dependents_user_id_confirmed", "user_id", "dependent_id",
+            postgresql_where=confirmed.is_(True), sqlite_where=confirmed.is_(True)
+        ),
+    )
+
     user = relationship("User", foreign_keys=[user_id], back_populates="dependents")
     dependent_user = relationship("User", foreign_keys=[dependent_id])
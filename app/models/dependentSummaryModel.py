@@ -0,0 +1,125 @@
+from sqlalchemy import Column, Integer, String, Boolean, Date, DDL, event
+from app.database import Base
+
+class DependentSummary(Base):
+    """Uma linha por vínculo Dependents, com os dados do dependente e o status do formulário mais recente.
+
+    Mantida por triggers em Dependents, Users e Forms (veja SUMMARY_TRIGGERS),
+    inclusive para escritas feitas por outros serviços no mesmo banco.
+    """
+    __tablename__ = "DependentSummaries"
+
+    user_id = Column(Integer, primary_key=True)
+    dependent_id = Column(Integer, primary_key=True, index=True)
+    confirmed = Column(Boolean, default=False)
+    user_full_name = Column(String(255))
+    user_birth_date = Column(Date)
+    user_email = Column(String(255))
+    form_status = Column(String(20))
+
+SUMMARY_COLUMNS = 'user_id, dependent_id, confirmed, user_full_name, user_birth_date, user_email, form_status'
+
+LATEST_FORM_STATUS = 'SELECT f.form_status FROM "Forms" f WHERE f.user_id = {user_id} ORDER BY f.id DESC LIMIT 1'
+
+def _select_link(row: str) -> str:
+    return (
+        f'SELECT {row}.user_id, {row}.dependent_id, {row}.confirmed, u.full_name, u.birth_date, u.email, '
+        f'({LATEST_FORM_STATUS.format(user_id="u.id")})'
+    )
+
+def _insert_link(row: str) -> str:
+    return (
+        f'INSERT INTO "DependentSummaries" ({SUMMARY_COLUMNS}) '
+        f'{_select_link(row)} FROM "Users" u WHERE u.id = {row}.dependent_id'
+    )
+
+def _delete_link(row: str) -> str:
+    return f'DELETE FROM "DependentSummaries" WHERE user_id = {row}.user_id AND dependent_id = {row}.dependent_id'
+
+UPDATE_USER = (
+    'UPDATE "DependentSummaries" SET user_full_name = NEW.full_name, user_birth_date = NEW.birth_date, '
+    'user_email = NEW.email WHERE dependent_id = NEW.id'
+)
+
+def _update_form_status(user_ids: str) -> str:
+    latest = LATEST_FORM_STATUS.format(user_id='"DependentSummaries".dependent_id')
+    return (
+        f'UPDATE "DependentSummaries" SET form_status = ({latest}) '
+        f'WHERE dependent_id IN ({user_ids})'
+    )
+
+# Reconstrói a tabela inteira (carga inicial na migração ou correção manual)
+REBUILD = [
+    'DELETE FROM "DependentSummaries"',
+    f'INSERT INTO "DependentSummaries" ({SUMMARY_COLUMNS}) '
+    f'{_select_link("d")} FROM "Dependents" d JOIN "Users" u ON u.id = d.dependent_id',
+]
+
+SUMMARY_TRIGGERS = {
+    "sqlite": [
+        f'CREATE TRIGGER dependent_summary_dependents_insert AFTER INSERT ON "Dependents" '
+        f'BEGIN {_insert_link("NEW")}; END',
+        f'CREATE TRIGGER dependent_summary_dependents_update AFTER UPDATE ON "Dependents" '
+        f'BEGIN {_delete_link("OLD")}; {_insert_link("NEW")}; END',
+        f'CREATE TRIGGER dependent_summary_dependents_delete AFTER DELETE ON "Dependents" '
+        f'BEGIN {_delete_link("OLD")}; END',
+        f'CREATE TRIGGER dependent_summary_users_update AFTER UPDATE OF full_name, birth_date, email ON "Users" '
+        f'BEGIN {UPDATE_USER}; END',
+        f'CREATE TRIGGER dependent_summary_forms_insert AFTER INSERT ON "Forms" '
+        f'BEGIN {_update_form_status("NEW.user_id")}; END',
+        f'CREATE TRIGGER dependent_summary_forms_update AFTER UPDATE ON "Forms" '
+        f'BEGIN {_update_form_status("OLD.user_id, NEW.user_id")}; END',
+        f'CREATE TRIGGER dependent_summary_forms_delete AFTER DELETE ON "Forms" '
+        f'BEGIN {_update_form_status("OLD.user_id")}; END',
+    ],
+    # No Postgres, OLD/NEW valem NULL quando não se aplicam à operação
+    "postgresql": [
+        f'''CREATE OR REPLACE FUNCTION dependent_summary_on_dependents() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN {_delete_link("OLD")}; END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN {_insert_link("NEW")}; END IF;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql''',
+        f'''CREATE OR REPLACE FUNCTION dependent_summary_on_users() RETURNS trigger AS $$
+BEGIN
+    {UPDATE_USER};
+    RETURN NULL;
+END $$ LANGUAGE plpgsql''',
+        f'''CREATE OR REPLACE FUNCTION dependent_summary_on_forms() RETURNS trigger AS $$
+BEGIN
+    {_update_form_status("OLD.user_id, NEW.user_id")};
+    RETURN NULL;
+END $$ LANGUAGE plpgsql''',
+        'CREATE TRIGGER dependent_summary_dependents AFTER INSERT OR UPDATE OR DELETE ON "Dependents" '
+        'FOR EACH ROW EXECUTE FUNCTION dependent_summary_on_dependents()',
+        'CREATE TRIGGER dependent_summary_users AFTER UPDATE OF full_name, birth_date, email ON "Users" '
+        'FOR EACH ROW EXECUTE FUNCTION dependent_summary_on_users()',
+        'CREATE TRIGGER dependent_summary_forms AFTER INSERT OR UPDATE OR DELETE ON "Forms" '
+        'FOR EACH ROW EXECUTE FUNCTION dependent_summary_on_forms()',
+    ],
+}
+
+DROP_SUMMARY_TRIGGERS = {
+    "sqlite": [
+        f"DROP TRIGGER IF EXISTS dependent_summary_{name}"
+        for name in ("dependents_insert", "dependents_update", "dependents_delete", "users_update",
+                     "forms_insert", "forms_update", "forms_delete")
+    ],
+    "postgresql": [
+        'DROP TRIGGER IF EXISTS dependent_summary_dependents ON "Dependents"',
+        'DROP TRIGGER IF EXISTS dependent_summary_users ON "Users"',
+        'DROP TRIGGER IF EXISTS dependent_summary_forms ON "Forms"',
+        'DROP FUNCTION IF EXISTS dependent_summary_on_dependents()',
+        'DROP FUNCTION IF EXISTS dependent_summary_on_users()',
+        'DROP FUNCTION IF EXISTS dependent_summary_on_forms()',
+    ],
+}
+
+# create_all (testes e scripts) cria os triggers depois de todas as tabelas;
+# em produção eles vêm da migração 0003. Os triggers antigos são removidos
+# antes, já que create_all também roda sobre bancos existentes.
+for _dialect, _statements in SUMMARY_TRIGGERS.items():
+    for _statement in DROP_SUMMARY_TRIGGERS[_dialect] + _statements:
+        event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+    for _statement in DROP_SUMMARY_TRIGGERS[_dialect]:
+        event.listen(Base.metadata, "before_drop", DDL(_statement).execute_if(dialect=_dialect))
@@ -6,8 +6,8 @@ class DerivedHealthData(Base):
     __tablename__ = "DerivedHealthData"
 
     id = Column(Integer, primary_key=True, index=True)
-    form_id = Column(Integer, ForeignKey("Forms.id"), nullable=False)
-    test_id = Column(Integer, ForeignKey("Tests.id"), nullable=False)
+    form_id = Column(Integer, ForeignKey("Forms.id"), nullable=False, index=True)
+    test_id = Column(Integer, ForeignKey("Tests.id"), nullable=False, index=True)
     name = Column(String(255), nullable=False)
     value = Column(String(255), nullable=False)
 
@@ -0,0 +1,28 @@
+from datetime import datetime
+from sqlalchemy import Column, Index, Integer, String, Text, TIMESTAMP
+from app.database import Base
+
+class EmailOutbox(Base):
+    __tablename__ = "EmailOutbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
+    last_error = Column(String(1024))
+    created_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
+    sent_at = Column(TIMESTAMP)
+    # Agrupa envios repetidos (ex.: confirmação de dependente para o mesmo par usuário/e-mail)
+    dedupe_key = Column(String(255))
+
+    __table_args__ = (
+        Index("ix_EmailOutbox_dedupe_key", "dedupe_key", "created_at"),
+        # No máximo um e-mail pendente por chave
+        Index(
+            "ix_EmailOutbox_dedupe_key_pending", "dedupe_key", unique=True,
+            postgresql_where=status == "pending", sqlite_where=status == "pending"
+        ),
+    )
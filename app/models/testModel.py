@@ -6,7 +6,7 @@ class Test(Base):
     __tablename__ = "Tests"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("Users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("Users.id"), nullable=False, index=True)
     test_name = Column(String(255), nullable=False)
     url = Column(String(400), nullable=False)
     test_date = Column(TIMESTAMP)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, TIMESTAMP, func
+from sqlalchemy import Column, Index, Integer, String, Date, TIMESTAMP, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -13,6 +13,11 @@ class User(Base):
     biological_sex = Column(String(1), nullable=False)
     creation_date = Column(TIMESTAMP, server_default=func.now())
 
+    __table_args__ = (
+        # Busca por e-mail sem diferenciar maiúsculas (pedidos de confirmação de dependente)
+        Index("ix_Users_email_lower", func.lower(email)),
+    )
+
     doctors = relationship("Doctor", back_populates="user")
     dependents = relationship("Dependent", foreign_keys="[Dependent.user_id]")
     tests = relationship("Test", back_populates="user")
@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SQL_PROFILE = os.getenv("SQL_PROFILE", "false").strip().lower() in ("1", "true", "yes", "on")
+# A partir de quantas repetições do mesmo comando numa requisição o padrão é tratado como N+1
+SQL_PROFILE_REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILE_REPEAT_THRESHOLD", "3"))
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|%\(\w+\)s|:\w+|\b\d+(?:\.\d+)?\b|\?")
+_PLACEHOLDER_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+def fingerprint(statement: str) -> str:
+    """Normaliza um comando SQL: literais e parâmetros viram `?` e listas de IN colapsam."""
+    normalized = _LITERALS.sub("?", _WHITESPACE.sub(" ", statement.strip()))
+    return _PLACEHOLDER_LISTS.sub("?, ...", normalized)
+
+class QueryProfile:
+    """Comandos SQL executados durante uma requisição (ou um bloco de teste)."""
+
+    def __init__(self):
+        self.statements: List[Tuple[str, float]] = []
+
+    def record(self, statement: str, seconds: float):
+        self.statements.append((statement, seconds))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(seconds for _, seconds in self.statements)
+
+    def repeated(self, threshold: int = 2) -> Dict[str, int]:
+        counts = Counter(fingerprint(statement) for statement, _ in self.statements)
+        return {text: total for text, total in counts.most_common() if total >= threshold}
+
+    def summary(self, threshold: int = SQL_PROFILE_REPEAT_THRESHOLD) -> dict:
+        return {
+            "queries": self.count,
+            "db_ms": round(self.total_seconds * 1000, 3),
+            "repeated": self.repeated(threshold),
+        }
+
+_current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info["profile_started"] = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = conn.info.pop("profile_started", None)
+    if profile is not None and started is not None:
+        profile.record(statement, time.perf_counter() - started)
+
+class QueryProfilerMiddleware:
+    """Middleware ASGI opcional (SQL_PROFILE=true) que expõe o perfil SQL de cada requisição.
+
+    O cabeçalho reflete os comandos executados até o início da resposta; o log,
+    emitido ao final, inclui também os de respostas em streaming.
+    """
+
+    def __init__(self, app, repeat_threshold: int = SQL_PROFILE_REPEAT_THRESHOLD):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                repeated = profile.repeated(self.repeat_threshold)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-query-count", str(profile.count).encode()),
+                    (b"x-db-time-ms", f"{profile.total_seconds * 1000:.3f}".encode()),
+                    (b"x-db-repeated-queries", str(sum(repeated.values())).encode()),
+                ]
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            summary = profile.summary(self.repeat_threshold)
+            record = {"method": scope["method"], "path": scope["path"], "status": status, **summary}
+            # Comandos repetidos na mesma requisição costumam indicar N+1
+            level = logging.WARNING if summary["repeated"] else logging.INFO
+            logger.log(level, json.dumps(record, ensure_ascii=False))
+
+@contextmanager
+def profile_queries():
+    """Coleta os comandos SQL executados dentro do bloco, em qualquer thread ou engine.
+
+    Usa listeners próprios em vez do ContextVar porque o TestClient executa a
+    aplicação em outra thread.
+    """
+    profile = QueryProfile()
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["profile_block_started"] = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("profile_block_started", time.perf_counter())
+        profile.record(statement, time.perf_counter() - started)
+
+    event.listen(Engine, "before_cursor_execute", before)
+    event.listen(Engine, "after_cursor_execute", after)
+    try:
+        yield profile
+    finally:
+        event.remove(Engine, "before_cursor_execute", before)
+        event.remove(Engine, "after_cursor_execute", after)
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """Helper de teste: falha se o bloco executar mais de `max_queries` comandos SQL."""
+    with profile_queries() as profile:
+        yield profile
+    if profile.count > max_queries:
+        statements = "\n".join(f"  {statement}" for statement, _ in profile.statements)
+        raise AssertionError(f"Expected at most {max_queries} queries, got {profile.count}:\n{statements}")
@@ -0,0 +1,136 @@
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Sequence
+from fastapi import HTTPException
+from app.cache import CACHE_BACKEND, CACHE_PREFIX, REDIS_URL
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", CACHE_BACKEND)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Pedidos de confirmação: até CAPACITY de uma vez, repostos ao longo de PERIOD segundos
+CONFIRM_RATE_LIMIT_CAPACITY = float(os.getenv("CONFIRM_RATE_LIMIT_CAPACITY", "5"))
+CONFIRM_RATE_LIMIT_PERIOD_SECONDS = float(os.getenv("CONFIRM_RATE_LIMIT_PERIOD_SECONDS", "3600"))
+
+class MemoryRateLimitBackend:
+    """Token buckets em memória do processo; as chaves menos usadas saem quando o limite é atingido."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+
+    async def take(self, keys: Sequence[str], capacity: float, refill_per_second: float) -> float:
+        """Retira uma ficha de cada bucket (tudo ou nada) e devolve 0, ou os segundos até haver fichas."""
+        now = time.monotonic()
+        levels = []
+        for key in keys:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            levels.append(min(capacity, tokens + (now - updated) * refill_per_second))
+
+        missing = max(1 - level for level in levels)
+        if missing > 0:
+            return missing / refill_per_second
+
+        for key, level in zip(keys, levels):
+            self._buckets[key] = (level - 1, now)
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0.0
+
+    async def give(self, keys: Sequence[str], capacity: float):
+        """Devolve uma ficha a cada bucket, sem passar da capacidade."""
+        for key in keys:
+            if key in self._buckets:
+                tokens, updated = self._buckets[key]
+                self._buckets[key] = (min(capacity, tokens + 1), updated)
+
+    async def clear(self):
+        self._buckets.clear()
+
+# Mesma regra do backend em memória, executada atomicamente no Redis
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local levels = {}
+local missing = 0
+for i, key in ipairs(KEYS) do
+    local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    local level = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    levels[i] = level
+    missing = math.max(missing, 1 - level)
+end
+if missing > 0 then
+    return tostring(missing / rate)
+end
+local ttl = math.ceil(capacity / rate * 1000)
+for i, key in ipairs(KEYS) do
+    redis.call('HSET', key, 'tokens', levels[i] - 1, 'updated', now)
+    redis.call('PEXPIRE', key, ttl)
+end
+return '0'
+"""
+
+GIVE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+for i, key in ipairs(KEYS) do
+    local tokens = tonumber(redis.call('HGET', key, 'tokens'))
+    if tokens then
+        redis.call('HSET', key, 'tokens', math.min(capacity, tokens + 1))
+    end
+end
+return 0
+"""
+
+class RedisRateLimitBackend:
+    """Buckets compartilhados entre processos; cada chave expira quando estaria cheia de novo."""
+
+    def __init__(self, client, prefix: str = CACHE_PREFIX + "rate:"):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(TAKE_SCRIPT)
+        self._give = client.register_script(GIVE_SCRIPT)
+
+    async def take(self, keys: Sequence[str], capacity: float, refill_per_second: float) -> float:
+        result = await self._take(keys=[self.prefix + key for key in keys], args=[capacity, refill_per_second, time.time()])
+        return float(result)
+
+    async def give(self, keys: Sequence[str], capacity: float):
+        await self._give(keys=[self.prefix + key for key in keys], args=[capacity])
+
+    async def clear(self):
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+class RateLimiter:
+    def __init__(self, backend, capacity: float, period_seconds: float):
+        self.backend = backend
+        self.capacity = capacity
+        self.refill_per_second = capacity / period_seconds
+
+    async def check(self, *keys: str):
+        """Levanta 429 com Retry-After quando algum dos buckets está vazio."""
+        retry_after = await self.backend.take(keys, self.capacity, self.refill_per_second)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429, detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+    async def refund(self, *keys: str):
+        """Devolve a ficha de um check() que acabou não custando nada (pedido coalescido)."""
+        await self.backend.give(keys, self.capacity)
+
+def build_backend(name: str = RATE_LIMIT_BACKEND):
+    if name == "memory":
+        return MemoryRateLimitBackend()
+    if name == "redis":
+        import redis.asyncio
+        return RedisRateLimitBackend(redis.asyncio.from_url(REDIS_URL))
+    raise ValueError(f"RATE_LIMIT_BACKEND inválido: '{name}'. Use 'memory' ou 'redis'.")
+
+confirm_limiter = RateLimiter(build_backend(), CONFIRM_RATE_LIMIT_CAPACITY, CONFIRM_RATE_LIMIT_PERIOD_SECONDS)
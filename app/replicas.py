@@ -0,0 +1,140 @@
+import asyncio
+import itertools
+import logging
+import os
+from typing import List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# round_robin alterna entre as réplicas; least_busy escolhe a com menos conexões em uso neste processo
+DB_REPLICA_SELECTION = os.getenv("DB_REPLICA_SELECTION", "round_robin")
+# Réplicas atrasadas mais que isso deixam de receber leituras até alcançarem o primário (0 desativa)
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "5"))
+
+# Atraso de replicação em segundos; sem WAL pendente a réplica está em dia, mesmo
+# que a última transação aplicada seja antiga (primário ocioso)
+LAG_QUERIES = {
+    "postgresql": (
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.lag: Optional[float] = None
+        # Conexões em uso contadas pelos eventos do pool (vale para qualquer poolclass)
+        self.in_use = 0
+        event.listen(engine.sync_engine, "checkout", self._checkout)
+        event.listen(engine.sync_engine, "checkin", self._checkin)
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.in_use += 1
+
+    def _checkin(self, dbapi_connection, connection_record):
+        self.in_use = max(0, self.in_use - 1)
+
+class ReplicaSet:
+    """Réplicas de leitura com seleção e verificação periódica de atraso."""
+
+    def __init__(self, engines: List[AsyncEngine], selection: str = DB_REPLICA_SELECTION,
+                 max_lag: float = DB_REPLICA_MAX_LAG_SECONDS, check_interval: float = DB_REPLICA_LAG_CHECK_INTERVAL):
+        if selection not in ("round_robin", "least_busy"):
+            raise ValueError(f"DB_REPLICA_SELECTION inválido: '{selection}'. Use 'round_robin' ou 'least_busy'.")
+        self.replicas = [Replica(f"replica{index}", engine) for index, engine in enumerate(engines)]
+        self.selection = selection
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[Engine]:
+        """Engine síncrono da réplica escolhida, ou None quando nenhuma está disponível."""
+        candidates = [replica for replica in self.replicas if replica.healthy]
+        if not candidates:
+            return None
+        if self.selection == "least_busy":
+            replica = min(candidates, key=lambda candidate: candidate.in_use)
+        else:
+            replica = candidates[next(self._counter) % len(candidates)]
+        return replica.engine.sync_engine
+
+    async def _measure_lag(self, replica: Replica) -> float:
+        query = LAG_QUERIES.get(replica.engine.dialect.name)
+        if query is None:
+            return 0.0
+        async with replica.engine.connect() as connection:
+            return float((await connection.execute(text(query))).scalar() or 0)
+
+    async def check_lag(self):
+        for replica in self.replicas:
+            try:
+                replica.lag = await self._measure_lag(replica)
+                healthy = not self.max_lag or replica.lag <= self.max_lag
+            except Exception:
+                logger.exception("Falha ao medir o atraso da réplica %s", replica.name)
+                replica.lag, healthy = None, False
+            if healthy != replica.healthy:
+                logger.warning("Réplica %s %s (atraso: %s s)", replica.name,
+                               "voltou a receber leituras" if healthy else "fora da rotação", replica.lag)
+            replica.healthy = healthy
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check_lag()
+
+    async def start(self):
+        # Sem guarda de atraso as réplicas ficam sempre na rotação
+        if not self.max_lag or self._task is not None:
+            return
+        # A primeira verificação roda antes de servir requisições
+        await self.check_lag()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+def _is_read(clause) -> bool:
+    # SELECT ... FOR UPDATE precisa do primário; text() e DML também
+    return bool(getattr(clause, "is_select", False)) and getattr(clause, "_for_update_arg", None) is None
+
+class RoutingSession(Session):
+    """Sessão das rotas de leitura: SELECTs vão para uma réplica até a primeira escrita.
+
+    A réplica é escolhida uma vez por sessão, para que a requisição leia de um
+    único snapshot. Depois de uma escrita (flush ou DML) a sessão fica presa ao
+    primário até o fim, para ler o que acabou de escrever.
+    """
+
+    def __init__(self, *args, replicas: ReplicaSet, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.pinned = False
+        self._replica: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self.pinned and (self._flushing or (clause is not None and not _is_read(clause))):
+            self.pinned = True
+        if self.pinned:
+            return self.bind
+        if self._replica is None:
+            # Sem réplica disponível a sessão inteira lê do primário
+            self._replica = self.replicas.choose() or self.bind
+        return self._replica
@@ -1,224 +1,261 @@
-import os
-import smtplib
-from dotenv import load_dotenv
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.models import dependentModel, userModel, formModel, doctorModel
+from typing import Annotated, List
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from app.models import dependentModel, userModel, doctorModel
+from app.models.dependentSummaryModel import DependentSummary
 from app.schemas import dependentSchema
-from datetime import datetime, timedelta
-from app.database import get_db
-
-import jwt
-import base64
+from app.database import get_db, get_read_db, insert_for
+from app.streaming import ndjson_response
+from app.etag import etag_response
+from app.serialization import list_response
+from app.bulk import BULK_MAX_ITEMS
+from app import mailer, tokens
+from app.ratelimit import confirm_limiter
+from app.config import get_settings
 from app.schemas.emailSchema import EmailSchema
-import email.message
-
-load_dotenv()
-
-login = os.getenv("MAIL_USERNAME")
-password = os.getenv("MAIL_PASSWORD")
-
-if not login or not password:
-    raise ValueError("MAIL_USERNAME and MAIL_PASSWORD must be set in the environment")
 
 router = APIRouter(
     prefix="/user/dependents",
     tags=["dependentes"]
 )
 
+# As leituras usam DependentSummaries, mantida por triggers no banco: uma linha
+# por vínculo, já com os dados do dependente e o status do último formulário.
+def _dependent_row(summary: DependentSummary) -> dependentSchema.Dependent:
+    return dependentSchema.Dependent.model_validate(summary)
+
+def _expiry_text(seconds: int) -> str:
+    # Validade do link no e-mail: horas quando exatas, senão minutos ("24 horas", "90 minutos")
+    if seconds % 3600 == 0:
+        amount, unit = seconds // 3600, "hora"
+    else:
+        amount, unit = max(1, round(seconds / 60)), "minuto"
+    return f"{amount} {unit}{'s' if amount != 1 else ''}"
+
+async def _read_link(db: AsyncSession, user_id: int, dependent_id: int):
+    return await db.get(DependentSummary, (user_id, dependent_id))
+
 @router.post("/", response_model=dependentSchema.Dependent)
-def create_dependent(dependent: dependentSchema.DependentCreate, db: Session = Depends(get_db)):
-    db_user = db.query(userModel.User).filter(userModel.User.id == dependent.user_id).first()
-    db_dependent_user = db.query(userModel.User).filter(userModel.User.id == dependent.dependent_id).first()
-    if not db_user or not db_dependent_user:
+async def create_dependent(dependent: dependentSchema.DependentCreate, db: AsyncSession = Depends(get_db)):
+    owner = aliased(userModel.User)
+    dependent_user = aliased(userModel.User)
+    # INSERT ... SELECT só gera a linha quando os dois usuários existem;
+    # ON CONFLICT DO NOTHING cobre o vínculo já cadastrado.
+    statement = insert_for(db, dependentModel.Dependent).from_select(
+        ["user_id", "dependent_id", "confirmed"],
+        select(owner.id, dependent_user.id, literal(dependent.confirmed)).select_from(owner).join(
+            dependent_user, dependent_user.id == dependent.dependent_id
+        ).where(owner.id == dependent.user_id)
+    ).on_conflict_do_nothing(
+        index_elements=["user_id", "dependent_id"]
+    ).returning(dependentModel.Dependent.user_id)
+    inserted = (await db.execute(statement)).first()
+
+    db_dependent = await _read_link(db, dependent.user_id, dependent.dependent_id)
+    if inserted is None:
+        await db.rollback()
+        if db_dependent is not None:
+            raise HTTPException(status_code=400, detail="Dependent already registered")
         raise HTTPException(status_code=400, detail="User or Dependent User not found")
-    existing_dependent = db.query(dependentModel.Dependent).filter(
-        dependentModel.Dependent.user_id == dependent.user_id,
-        dependentModel.Dependent.dependent_id == dependent.dependent_id
-    ).first()
-    if existing_dependent:
-        raise HTTPException(status_code=400, detail="Dependent already registered")
-    db_dependent = dependentModel.Dependent(**dependent.dict())
-    db.add(db_dependent)
-    db.commit()
-    db.refresh(db_dependent)
-
-    user_full_name = db_dependent_user.full_name
-    user_birth_date = db_dependent_user.birth_date
-    user_email = db_dependent_user.email
-    form_status = db.query(formModel.Form.form_status).filter(formModel.Form.user_id == dependent.dependent_id).first()
-
-    dependent_data = db_dependent.__dict__
-    dependent_data.update({
-        "user_full_name": user_full_name,
-        "user_birth_date": user_birth_date.isoformat() if user_birth_date else None,
-        "user_email": user_email,
-        "form_status": form_status[0] if form_status else None
-    })
-
-    return dependentSchema.Dependent(**dependent_data)
 
-@router.get("/{user_id}/{dependent_id}", response_model=dependentSchema.Dependent)
-def read_dependent(user_id: int, dependent_id: int, db: Session = Depends(get_db)):
-    db_dependent = db.query(
-        dependentModel.Dependent,
-        userModel.User.full_name.label("user_full_name"),
-        userModel.User.birth_date.label("user_birth_date"),
-        userModel.User.email.label("user_email"),
-        formModel.Form.form_status.label("form_status")
-    ).join(
-        userModel.User, userModel.User.id == dependentModel.Dependent.dependent_id
-    ).outerjoin(
-        formModel.Form, formModel.Form.user_id == dependentModel.Dependent.dependent_id
-    ).filter(
-        dependentModel.Dependent.user_id == user_id,
-        dependentModel.Dependent.dependent_id == dependent_id
-    ).first()
+    await db.commit()
+    return _dependent_row(db_dependent)
 
-    if db_dependent is None:
-        raise HTTPException(status_code=404, detail="Dependent not found")
+@router.post("/bulk", response_model=List[dependentSchema.DependentBulkResult])
+async def create_dependents_bulk(
+    dependents: Annotated[List[dependentSchema.DependentCreate], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db)
+):
+    referenced_ids = {item.user_id for item in dependents} | {item.dependent_id for item in dependents}
+    existing_ids = set((await db.execute(
+        select(userModel.User.id).where(userModel.User.id.in_(referenced_ids))
+    )).scalars())
 
-    dependent, full_name, birth_date, email, form_status = db_dependent
-    dependent_data = dependent.__dict__
-    dependent_data.update({
-        "user_full_name": full_name,
-        "user_birth_date": birth_date.isoformat() if birth_date else None,
-        "user_email": email,
-        "form_status": form_status
-    })
+    results = []
+    pending = {}
+    for index, item in enumerate(dependents):
+        key = (item.user_id, item.dependent_id)
+        result = dependentSchema.DependentBulkResult(index=index, user_id=item.user_id, dependent_id=item.dependent_id, ok=False)
+        if item.user_id not in existing_ids or item.dependent_id not in existing_ids:
+            result.detail = "User or Dependent User not found"
+        elif key in pending:
+            result.detail = "Duplicate item in request"
+        else:
+            pending[key] = item
+        results.append(result)
+
+    inserted = set()
+    if pending:
+        statement = insert_for(db, dependentModel.Dependent).values([
+            item.model_dump() for item in pending.values()
+        ]).on_conflict_do_nothing(
+            index_elements=["user_id", "dependent_id"]
+        ).returning(dependentModel.Dependent.user_id, dependentModel.Dependent.dependent_id)
+        inserted = {tuple(row) for row in await db.execute(statement)}
+        await db.commit()
+
+    for result in results:
+        if result.detail is not None:
+            continue
+        if (result.user_id, result.dependent_id) in inserted:
+            result.ok = True
+        else:
+            result.detail = "Dependent already registered"
+    return results
 
-    return dependentSchema.Dependent(**dependent_data)
+@router.get("/export")
+async def export_dependents(db: AsyncSession = Depends(get_read_db)):
+    statement = select(*DependentSummary.__table__.columns).order_by(
+        DependentSummary.user_id, DependentSummary.dependent_id
+    )
+    return ndjson_response(db, statement, dependentSchema.Dependent)
 
-@router.get("/", response_model=List[dependentSchema.Dependent])
-def read_dependents(db: Session = Depends(get_db)):
-    dependents = db.query(
-        dependentModel.Dependent,
-        userModel.User.full_name.label("user_full_name"),
-        userModel.User.birth_date.label("user_birth_date"),
-        userModel.User.email.label("user_email"),
-        formModel.Form.form_status.label("form_status")
-    ).join(
-        userModel.User, userModel.User.id == dependentModel.Dependent.dependent_id
-    ).outerjoin(
-        formModel.Form, formModel.Form.user_id == dependentModel.Dependent.dependent_id
-    ).all()
+@router.get("/{user_id}/{dependent_id}", response_model=dependentSchema.Dependent)
+async def read_dependent(user_id: int, dependent_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    db_dependent = await _read_link(db, user_id, dependent_id)
+    if db_dependent is None:
+        raise HTTPException(status_code=404, detail="Dependent not found")
 
-    results = []
-    for dep, full_name, birth_date, email, form_status in dependents:
-        dep_data = dep.__dict__
-        dep_data.update({
-            "user_full_name": full_name,
-            "user_birth_date": birth_date.isoformat() if birth_date else None,
-            "user_email": email,
-            "form_status": form_status
-        })
-        results.append(dep_data)
+    return etag_response(request, response, _dependent_row(db_dependent).model_dump(mode="json"))
 
-    return results
+@router.get("/", response_model=List[dependentSchema.Dependent])
+async def read_dependents(db: AsyncSession = Depends(get_read_db)):
+    dependents = (await db.execute(
+        select(*DependentSummary.__table__.columns).order_by(DependentSummary.user_id, DependentSummary.dependent_id)
+    )).mappings()
+    return list_response(dependentSchema.Dependent, dependents)
 
 @router.put("/{user_id}/{dependent_id}", response_model=dependentSchema.Dependent)
-def update_dependent(user_id: int, dependent_id: int, dependent: dependentSchema.DependentBase, db: Session = Depends(get_db)):
-    db_dependent = db.query(dependentModel.Dependent).filter(
-        dependentModel.Dependent.user_id == user_id,
-        dependentModel.Dependent.dependent_id == dependent_id
-    ).first()
-    if db_dependent is None:
+async def update_dependent(user_id: int, dependent_id: int, dependent: dependentSchema.DependentBase, db: AsyncSession = Depends(get_db)):
+    updated = (await db.execute(
+        update(dependentModel.Dependent).where(
+            dependentModel.Dependent.user_id == user_id,
+            dependentModel.Dependent.dependent_id == dependent_id
+        ).values(**dependent.model_dump()).returning(
+            dependentModel.Dependent.user_id, dependentModel.Dependent.dependent_id
+        ).execution_options(synchronize_session=False)
+    )).first()
+    if updated is None:
         raise HTTPException(status_code=404, detail="Dependent not found")
-    for key, value in dependent.dict().items():
-        setattr(db_dependent, key, value)
-    db.commit()
-    db.refresh(db_dependent)
 
-    db_user = db.query(userModel.User).filter(userModel.User.id == db_dependent.dependent_id).first()
-    form_status = db.query(formModel.Form.form_status).filter(formModel.Form.user_id == db_dependent.dependent_id).first()
-    
-    return dependentSchema.Dependent(
-        user_id=db_dependent.user_id,
-        dependent_id=db_dependent.dependent_id,
-        confirmed=db_dependent.confirmed,
-        user_full_name=db_user.full_name if db_user else None,
-        user_birth_date=db_user.birth_date.isoformat() if db_user and db_user.birth_date else None,
-        user_email=db_user.email if db_user else None,
-        form_status=form_status[0] if form_status else None
-    )
+    db_dependent = await _read_link(db, *updated)
+    await db.commit()
+    return _dependent_row(db_dependent)
 
 @router.delete("/{user_id}/{dependent_id}")
-def delete_dependent(user_id: int, dependent_id: int, db: Session = Depends(get_db)):
-    db_dependent = db.query(dependentModel.Dependent).filter(
-        dependentModel.Dependent.user_id == user_id,
-        dependentModel.Dependent.dependent_id == dependent_id
-    ).first()
+async def delete_dependent(user_id: int, dependent_id: int, db: AsyncSession = Depends(get_db)):
+    db_dependent = await db.get(dependentModel.Dependent, (user_id, dependent_id))
     if db_dependent is None:
         raise HTTPException(status_code=404, detail="Dependent not found")
-    db.delete(db_dependent)
-    db.commit()
+    await db.delete(db_dependent)
+    await db.commit()
     return {"ok": True}
 
 @router.get("/{user_id}", response_model=List[dependentSchema.Dependent])
-def read_user_dependents(user_id: int, db: Session = Depends(get_db)):
-    db_user = db.query(userModel.User).filter(userModel.User.id == user_id).first()
+async def read_user_dependents(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    db_user = await db.get(userModel.User, user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    dependents = db.query(
-        dependentModel.Dependent,
-        userModel.User.full_name.label("user_full_name"),
-        userModel.User.birth_date.label("user_birth_date"),
-        userModel.User.email.label("user_email"),
-        formModel.Form.form_status.label("form_status")
-    ).join(
-        userModel.User, userModel.User.id == dependentModel.Dependent.dependent_id
-    ).outerjoin(
-        formModel.Form, formModel.Form.user_id == dependentModel.Dependent.dependent_id
-    ).filter(
-        dependentModel.Dependent.user_id == user_id,
-        dependentModel.Dependent.confirmed == True
-    ).all()
+    dependents = (await db.execute(select(DependentSummary).where(
+        DependentSummary.user_id == user_id,
+        DependentSummary.confirmed == True
+    ).order_by(DependentSummary.dependent_id))).scalars().all()
 
     if not dependents:
         raise HTTPException(status_code=404, detail="No confirmed dependents found")
 
-    results = []
-    for dep, full_name, birth_date, email, form_status in dependents:
-        dep_data = dep.__dict__
-        dep_data.update({
-            "user_full_name": full_name,
-            "user_birth_date": birth_date.isoformat() if birth_date else None,
-            "user_email": email,
-            "form_status": form_status
-        })
-        results.append(dep_data)
-
-    return results
-
-@router.post("/confirm/{user_id}")
-def confirm_dependent(user_id: int, request: EmailSchema, db: Session = Depends(get_db)):
-    existing_user = db.query(userModel.User).filter(userModel.User.email == request.email).first()
+    return etag_response(request, response, [_dependent_row(summary).model_dump(mode="json") for summary in dependents])
+
+# Declarada antes de /confirm/{user_id}, que também casaria com "verify"
+@router.post("/confirm/verify", response_model=dependentSchema.DependentConfirmation)
+async def verify_dependent_confirmation(body: dependentSchema.ConfirmDependentVerify, db: AsyncSession = Depends(get_db)):
+    try:
+        claims = tokens.verify_confirmation_token(body.token)
+    except tokens.InvalidToken as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    # Tokens antigos não carregam os ids; eles vêm do link
+    user_id = claims.user_id if claims.user_id is not None else body.user_id
+    dependent_id = claims.dependent_id if claims.dependent_id is not None else body.dependent_id
+    if user_id is None or dependent_id is None:
+        raise HTTPException(status_code=400, detail="user_id and dependent_id are required for this token")
+    if body.user_id not in (None, user_id) or body.dependent_id not in (None, dependent_id):
+        raise HTTPException(status_code=400, detail="Token does not match this link")
+
+    # O registro de tokens usados barra replays sem consultar o banco
+    if not await tokens.used_tokens.consume(claims.token_id, claims.expires_at):
+        raise HTTPException(status_code=409, detail="Token already used")
+
+    # O e-mail do token precisa ser o do dependente (sem diferenciar maiúsculas)
+    dependent_user = aliased(userModel.User)
+    email_matches = select(dependent_user.id).where(
+        dependent_user.id == dependent_id, func.lower(dependent_user.email) == claims.email.lower()
+    ).exists()
+    if claims.user_id is None:
+        # Tokens antigos não dizem quem pediu: o solicitante vem do corpo, então só
+        # um vínculo já existente é confirmado, nunca criado
+        statement = update(dependentModel.Dependent).where(
+            dependentModel.Dependent.user_id == user_id,
+            dependentModel.Dependent.dependent_id == dependent_id,
+            email_matches,
+        ).values(confirmed=True).returning(dependentModel.Dependent.user_id)
+    else:
+        # Os ids vêm assinados no token: um único comando cria o vínculo já
+        # confirmado ou marca o existente
+        owner = aliased(userModel.User)
+        statement = insert_for(db, dependentModel.Dependent).from_select(
+            ["user_id", "dependent_id", "confirmed"],
+            select(owner.id, literal(dependent_id), literal(True)).where(owner.id == user_id, email_matches)
+        ).on_conflict_do_update(
+            index_elements=["user_id", "dependent_id"], set_={"confirmed": True}
+        ).returning(dependentModel.Dependent.user_id)
+    try:
+        confirmed = (await db.execute(statement)).first()
+        if confirmed is None:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="User or Dependent User not found")
+        await db.commit()
+    except Exception:
+        await tokens.used_tokens.release(claims.token_id)
+        raise
+    return dependentSchema.DependentConfirmation(user_id=user_id, dependent_id=dependent_id, confirmed=True)
+
+@router.post("/confirm/{user_id}", status_code=202)
+async def confirm_dependent(user_id: int, request: EmailSchema, db: AsyncSession = Depends(get_db)):
+    # Um único e-mail normalizado na chave de dedupe, no limite, na busca e no envio
+    email = request.email.lower()
+
+    # Cliques repetidos viram um único envio pendente e não consomem o limite
+    dedupe_key = f"confirm-dependent:{user_id}:{email}"
+    if await mailer.has_recent_email(db, dedupe_key):
+        return {"message": "Email enviado!"}
+
+    # Limite por solicitante e por destinatário antes da busca: e-mails desconhecidos
+    # também pagam, senão a rota serviria para enumerar contas
+    limiter_keys = (f"confirm:user:{user_id}", f"confirm:email:{email}")
+    await confirm_limiter.check(*limiter_keys)
+
+    existing_user = (await db.execute(
+        select(userModel.User).where(func.lower(userModel.User.email) == email)
+    )).scalars().first()
     if existing_user is None:
         raise HTTPException(status_code=404, detail="User with the specified email not found")
     
     dependent_id = existing_user.id
+    url_safe_token = tokens.issue_confirmation_token(user_id, dependent_id, email)
 
-    token_data = {
-        "email": request.email,
-        "expires": str(datetime.utcnow() + timedelta(hours=24))
-    }
-
-    jwt_token = jwt.encode(token_data, os.getenv("SECRET_KEY"), algorithm=os.getenv("ALGORITHM"))
-    
-    url_safe_token = base64.urlsafe_b64encode(jwt_token.encode()).decode().rstrip('=')
-
-    print(url_safe_token)
-
-    doctor = db.query(doctorModel.Doctor).filter(doctorModel.Doctor.user_id == user_id).first()
+    settings = get_settings()
+    doctor = await db.get(doctorModel.Doctor, user_id)
     if doctor:
         link = "{0}/auth/dependents/confirm/{1}/{2}/{3}/{4}".format(
-            os.getenv("FRONTEND_URL"), user_id, dependent_id, url_safe_token, doctor.crm
+            settings.frontend_url, user_id, dependent_id, url_safe_token, doctor.crm
         )
     else:
         link = "{0}/auth/dependents/confirm/{1}/{2}/{3}".format(
-            os.getenv("FRONTEND_URL"), user_id, dependent_id, url_safe_token
+            settings.frontend_url, user_id, dependent_id, url_safe_token
         )
 
     html = """
@@ -232,25 +269,18 @@ def confirm_dependent(user_id: int, request: EmailSchema, db: Session = Depends(
         <p>Recebemos uma solicitação de confirmação de dependente para sua conta.</p>
         <p>Para confirmar sua dependência, clique no link abaixo:</p>
         <a href="{1}">Confirmar dependência</a>
-        <p>Para a sua segurança, o link expira em 24 horas.</p>
+        <p>Para a sua segurança, o link expira em {2}.</p>
         <p>Caso você não tenha solicitado essa mudança, ignore este e-mail.</p>
     <div>
     </body>
     </html>
-    """.format(existing_user.full_name, link)
-
-    message = email.message.Message()
-    message["Subject"] = "Confirmação de dependente"
-    message["From"] = login
-    message["To"] = request.email
-    message.add_header("Content-Type", "text/html")
-    message.set_payload(html)
-
-    server = smtplib.SMTP("smtp.gmail.com", 587)
-    server.starttls()
-    server.login(login, password)
-    server.sendmail(login, request.email, message.as_string().encode("utf-8"))
-    server.quit()
-    print("E-mail enviado com sucesso!") 
+    """.format(existing_user.full_name, link, _expiry_text(tokens.CONFIRMATION_TOKEN_TTL_SECONDS))
+
+    if await mailer.enqueue_unique_email(db, dedupe_key, email, "Confirmação de dependente", html):
+        await db.commit()
+        mailer.notify_dispatcher()
+    else:
+        # Um pedido simultâneo enfileirou primeiro: este não gerou envio
+        await confirm_limiter.refund(*limiter_keys)
 
     return {"message": "Email enviado!"}
@@ -1,43 +1,66 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import doctorModel, userModel
 from app.schemas import doctorSchema
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.streaming import ndjson_response
+from app.cache import user_cache, doctor_key
+from app.etag import check_if_match, compute_etag, etag_response, precondition_failed, unchanged
+from app.serialization import list_response
 
 router = APIRouter(
     prefix="/user/doctors",
     tags=["medicos"]
 )
 
+@router.get("/export")
+async def export_doctors(db: AsyncSession = Depends(get_read_db)):
+    statement = select(*doctorModel.Doctor.__table__.columns).order_by(doctorModel.Doctor.user_id)
+    return ndjson_response(db, statement, doctorSchema.Doctor)
+
 @router.get("/{doctor_id}", response_model=doctorSchema.Doctor)
-def read_doctor(doctor_id: int, db: Session = Depends(get_db)):
-    db_doctor = db.query(doctorModel.Doctor).filter(doctorModel.Doctor.user_id == doctor_id).first()
-    if db_doctor is None:
-        raise HTTPException(status_code=404, detail="Doctor not found")
-    return db_doctor
+async def read_doctor(doctor_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    doctor_data = await user_cache.get(doctor_key(doctor_id))
+    if doctor_data is None:
+        db_doctor = await db.get(doctorModel.Doctor, doctor_id)
+        if db_doctor is None:
+            raise HTTPException(status_code=404, detail="Doctor not found")
+        doctor_data = doctorSchema.Doctor.model_validate(db_doctor).model_dump(mode="json")
+        await user_cache.set(doctor_key(doctor_id), doctor_data)
+    return etag_response(request, response, doctor_data)
 
 @router.get("/", response_model=List[doctorSchema.Doctor])
-def read_doctors(db: Session = Depends(get_db)):
-    doctors = db.query(doctorModel.Doctor).all()
-    return doctors
+async def read_doctors(db: AsyncSession = Depends(get_read_db)):
+    doctors = (await db.execute(select(*doctorModel.Doctor.__table__.columns))).mappings()
+    return list_response(doctorSchema.Doctor, doctors)
 
 @router.put("/{doctor_id}", response_model=doctorSchema.Doctor)
-def update_doctor(doctor_id: int, doctor: doctorSchema.DoctorBase, db: Session = Depends(get_db)):
-    db_doctor = db.query(doctorModel.Doctor).filter(doctorModel.Doctor.user_id == doctor_id).first()
+async def update_doctor(doctor_id: int, doctor: doctorSchema.DoctorBase, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    db_doctor = await db.get(doctorModel.Doctor, doctor_id)
     if db_doctor is None:
         raise HTTPException(status_code=404, detail="Doctor not found")
-    for key, value in doctor.model_dump().items():
-        setattr(db_doctor, key, value)
-    db.commit()
-    db.refresh(db_doctor)
-    return db_doctor
+    conditional = check_if_match(request, doctorSchema.Doctor.model_validate(db_doctor).model_dump(mode="json"))
+    Doctor = doctorModel.Doctor
+    conditions = unchanged(Doctor, db_doctor, doctorSchema.Doctor.model_fields) if conditional else []
+    statement = update(Doctor).where(Doctor.user_id == doctor_id, *conditions).values(**doctor.model_dump())
+    row = (await db.execute(statement.returning(*Doctor.__table__.columns))).mappings().first()
+    if row is None:
+        # Outra escrita entrou entre a leitura e o UPDATE
+        raise precondition_failed()
+    await db.commit()
+    await user_cache.invalidate_user(doctor_id)
+    doctor_data = doctorSchema.Doctor.model_validate(dict(row)).model_dump(mode="json")
+    response.headers["ETag"] = compute_etag(doctor_data)
+    return doctor_data
 
 @router.delete("/{doctor_id}")
-def delete_doctor(doctor_id: int, db: Session = Depends(get_db)):
-    db_doctor = db.query(doctorModel.Doctor).filter(doctorModel.Doctor.user_id == doctor_id).first()
+async def delete_doctor(doctor_id: int, db: AsyncSession = Depends(get_db)):
+    db_doctor = await db.get(doctorModel.Doctor, doctor_id)
     if db_doctor is None:
         raise HTTPException(status_code=404, detail="Doctor not found")
-    db.delete(db_doctor)
-    db.commit()
+    await db.delete(db_doctor)
+    await db.commit()
+    await user_cache.invalidate_user(doctor_id)
     return {"ok": True}
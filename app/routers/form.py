@@ -0,0 +1,19 @@
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cohorts import COHORT_METRICS, cohort_statistics
+from app.database import get_read_db
+from app.schemas import formSchema
+
+router = APIRouter(
+    prefix="/user/forms",
+    tags=["formularios"]
+)
+
+CohortMetric = Literal[COHORT_METRICS]
+
+@router.get("/stats/cohorts", response_model=List[formSchema.CohortStatistics])
+async def read_cohort_statistics(metric: Optional[List[CohortMetric]] = Query(None), db: AsyncSession = Depends(get_read_db)):
+    # Sem ?metric=... todas as métricas numéricas do formulário
+    metrics = list(dict.fromkeys(metric)) if metric else list(COHORT_METRICS)
+    return await cohort_statistics(db, metrics)
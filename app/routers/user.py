@@ -1,16 +1,26 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from datetime import date, datetime
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from app.models.userModel import User
 from app.models.doctorModel import Doctor
 from app.models.dependentModel import Dependent
 from app.models.testModel import Test
 from app.models.derivedHealthDataModel import DerivedHealthData
 from app.models.formModel import Form
-from app.schemas.userSchema import User as UserSchema, UserUpdate ,UserWithDoctor as UserWithDoctorSchema
-from app.database import get_db
-from app import utils
+from app.schemas.userSchema import User as UserSchema, UserUpdate ,UserWithDoctor as UserWithDoctorSchema, Doctor as DoctorSchema
+from app.schemas.userSchema import UserImport, UserBulkUpdate, UserBulkError, UserBulkImportResult, UserBulkUpdateResult
+from app.database import get_db, get_read_db, insert_for
+from app import hashing, utils
+from app.cache import user_cache, user_key, user_with_doctor_key
+from app.etag import check_if_match, compute_etag, etag_response, precondition_failed, unchanged
+from app.streaming import ndjson_response
+from app.serialization import list_response
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor
+from app.bulk import BULK_MAX_ITEMS, chunked, iter_records
 
 router = APIRouter(
     prefix="/user/users",
@@ -21,86 +31,262 @@ class PasswordUpdate(BaseModel):
     old_password: str
     new_password: str
 
-@router.get("/{user_id}", response_model=UserSchema)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.id == user_id).first()
+@router.get("/export")
+async def export_users(db: AsyncSession = Depends(get_read_db)):
+    statement = select(*User.__table__.columns).order_by(User.id)
+    return ndjson_response(db, statement, UserSchema)
+
+def _validation_detail(exc: ValidationError) -> str:
+    error = exc.errors()[0]
+    field = ".".join(str(part) for part in error["loc"])
+    return f"{field}: {error['msg']}" if field else error["msg"]
+
+async def _import_chunk(db: AsyncSession, chunk: list, errors: List[UserBulkError]) -> int:
+    pending = {}
+    for line, record in chunk:
+        if isinstance(record, str):
+            errors.append(UserBulkError(line=line, detail=record))
+            continue
+        try:
+            user = UserImport.model_validate(record)
+        except ValidationError as exc:
+            errors.append(UserBulkError(line=line, detail=_validation_detail(exc)))
+            continue
+        if user.email in pending:
+            errors.append(UserBulkError(line=line, detail="Duplicate email in request"))
+            continue
+        pending[user.email] = (line, user)
+
+    # Descarta e-mails já cadastrados antes de pagar o custo do hash
+    if pending:
+        registered = set((await db.execute(select(User.email).where(User.email.in_(pending)))).scalars())
+        for email in registered:
+            line, _ = pending.pop(email)
+            errors.append(UserBulkError(line=line, detail="Email already registered"))
+    if not pending:
+        return 0
+
+    hashes = await hashing.hash_passwords([user.password for _, user in pending.values()])
+    rows = [
+        dict(user.model_dump(exclude={"password"}), password=password_hash)
+        for (_, user), password_hash in zip(pending.values(), hashes)
+    ]
+    # executemany em lotes; ON CONFLICT cobre inserções concorrentes do mesmo e-mail
+    statement = insert_for(db, User).on_conflict_do_nothing(index_elements=["email"]).returning(User.email)
+    inserted = set((await db.execute(statement, rows)).scalars())
+    await db.commit()
+
+    for email, (line, _) in pending.items():
+        if email not in inserted:
+            errors.append(UserBulkError(line=line, detail="Email already registered"))
+    return len(inserted)
+
+@router.post("/bulk", response_model=UserBulkImportResult)
+async def import_users(request: Request, db: AsyncSession = Depends(get_db)):
+    """Importa usuários de um corpo JSONL ou CSV lido em streaming, um lote por transação."""
+    created = 0
+    errors: List[UserBulkError] = []
+    async for chunk in chunked(iter_records(request)):
+        created += await _import_chunk(db, chunk, errors)
+    errors.sort(key=lambda error: error.line)
+    return UserBulkImportResult(created=created, failed=len(errors), errors=errors)
+
+@router.patch("/bulk", response_model=List[UserBulkUpdateResult])
+async def update_users_bulk(
+    updates: Annotated[List[UserBulkUpdate], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db)
+):
+    existing_ids = set((await db.execute(
+        select(User.id).where(User.id.in_({item.id for item in updates}))
+    )).scalars())
+    emails = {item.email for item in updates if item.email is not None}
+    email_owners = dict((await db.execute(select(User.email, User.id).where(User.email.in_(emails)))).all()) if emails else {}
+
+    results = []
+    rows = []
+    seen_ids = set()
+    for index, item in enumerate(updates):
+        values = item.model_dump(exclude_unset=True, exclude={"id"})
+        result = UserBulkUpdateResult(index=index, id=item.id, ok=False)
+        null_fields = [key for key, value in values.items() if value is None]
+        if item.id in seen_ids:
+            result.detail = "Duplicate item in request"
+        elif item.id not in existing_ids:
+            result.detail = "User not found"
+        elif null_fields:
+            result.detail = f"{null_fields[0]}: must not be null"
+        elif email_owners.get(values.get("email"), item.id) != item.id:
+            result.detail = "Email already registered"
+        else:
+            result.ok = True
+            if values:
+                rows.append({"id": item.id, **values})
+                if "email" in values:
+                    email_owners[values["email"]] = item.id
+        seen_ids.add(item.id)
+        results.append(result)
+
+    if rows:
+        # UPDATE em lote pela chave primária (executemany agrupado por conjunto de colunas)
+        await db.execute(update(User), rows)
+        await db.commit()
+        for row in rows:
+            await user_cache.invalidate_user(row["id"])
+    return results
+
+def _user_with_doctor(db_user: User) -> UserWithDoctorSchema:
+    doctor = db_user.doctors[0] if db_user.doctors else None
+    return UserWithDoctorSchema(
+        **UserSchema.model_validate(db_user).model_dump(),
+        doctor=DoctorSchema.model_validate(doctor) if doctor else None
+    )
+
+def _parse_ids(ids: str) -> List[int]:
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if not parsed:
+        raise HTTPException(status_code=400, detail="ids must not be empty")
+    if len(parsed) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGE_SIZE} ids per request")
+    return parsed
+
+@router.get("/with-doctor", response_model=List[UserWithDoctorSchema])
+async def get_users_with_doctor(ids: str, db: AsyncSession = Depends(get_read_db)):
+    result = await db.execute(
+        select(User).options(joinedload(User.doctors)).where(User.id.in_(_parse_ids(ids))).order_by(User.id)
+    )
+    return [_user_with_doctor(db_user) for db_user in result.unique().scalars()]
+
+@router.get("/with-doctor/{user_id}", response_model=UserWithDoctorSchema)
+async def get_user_with_doctor(user_id: int, db: AsyncSession = Depends(get_db)):
+    cached = await user_cache.get(user_with_doctor_key(user_id))
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        select(User).options(joinedload(User.doctors)).where(User.id == user_id)
+    )
+    db_user = result.unique().scalar_one_or_none()
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return db_user
+    user_data = _user_with_doctor(db_user).model_dump(mode="json")
+    await user_cache.set(user_with_doctor_key(user_id), user_data)
+    return user_data
+
+@router.get("/{user_id}", response_model=UserSchema)
+async def read_user(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    user_data = await user_cache.get(user_key(user_id))
+    if user_data is None:
+        db_user = await db.get(User, user_id)
+        if db_user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        user_data = UserSchema.model_validate(db_user).model_dump(mode="json")
+        await user_cache.set(user_key(user_id), user_data)
+    return etag_response(request, response, user_data)
 
 @router.get("/", response_model=List[UserSchema])
-def read_users(db: Session = Depends(get_db)):
-    users = db.query(User).all()
-    return users
+async def read_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    email: Optional[str] = None,
+    biological_sex: Optional[str] = Query(None, pattern='^(M|F)$'),
+    birth_date_from: Optional[date] = None,
+    birth_date_to: Optional[date] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Colunas em vez de entidades: as linhas vão direto para o JSON, sem objetos ORM
+    query = select(*User.__table__.columns)
+    if cursor is not None:
+        query = query.where(User.id > decode_cursor(cursor))
+    if email is not None:
+        query = query.where(User.email == email)
+    if biological_sex is not None:
+        query = query.where(User.biological_sex == biological_sex)
+    if birth_date_from is not None:
+        query = query.where(User.birth_date >= birth_date_from)
+    if birth_date_to is not None:
+        query = query.where(User.birth_date <= birth_date_to)
+    if created_from is not None:
+        query = query.where(User.creation_date >= created_from)
+    if created_to is not None:
+        query = query.where(User.creation_date <= created_to)
+
+    # Busca um registro a mais para saber se existe uma próxima página
+    result = await db.execute(query.order_by(User.id).limit(limit + 1))
+    users = result.mappings().all()
+    headers = {}
+    if len(users) > limit:
+        users = users[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(users[-1]["id"])
+    return list_response(UserSchema, users, headers)
 
 @router.patch("/{user_id}", response_model=UserSchema)
-def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.id == user_id).first()
+async def update_user(user_id: int, user_update: UserUpdate, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    db_user = await db.get(User, user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    for key, value in user_update.dict(exclude_unset=True).items():
-        setattr(db_user, key, value)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    user_data = UserSchema.model_validate(db_user).model_dump(mode="json")
+    conditional = check_if_match(request, user_data)
+    values = user_update.model_dump(exclude_unset=True)
+    if values:
+        conditions = unchanged(User, db_user, UserSchema.model_fields) if conditional else []
+        statement = update(User).where(User.id == user_id, *conditions).values(**values).returning(*User.__table__.columns)
+        row = (await db.execute(statement)).mappings().first()
+        if row is None:
+            # Outra escrita entrou entre a leitura e o UPDATE
+            raise precondition_failed()
+        await db.commit()
+        await user_cache.invalidate_user(user_id)
+        user_data = UserSchema.model_validate(dict(row)).model_dump(mode="json")
+    response.headers["ETag"] = compute_etag(user_data)
+    return user_data
 
 @router.patch("/{user_id}/password", response_model=UserSchema)
-def update_user_password(user_id: int, password_update: PasswordUpdate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.id == user_id).first()
+async def update_user_password(user_id: int, password_update: PasswordUpdate, db: AsyncSession = Depends(get_db)):
+    db_user = await db.get(User, user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    decrypted_password = utils.decrypt_password(db_user.password)
-    if not utils.verify_password(password_update.old_password, decrypted_password):
+
+    if not await utils.check_user_password(db_user, password_update.old_password):
         raise HTTPException(status_code=400, detail="Old password does not match")
-    
-    encrypted_password = utils.encrypt_password(password_update.new_password)
-    db_user.password = encrypted_password
-    db.commit()
-    db.refresh(db_user)
+
+    db_user.password = await hashing.hash_password_async(password_update.new_password)
+    await db.commit()
+    await user_cache.invalidate_user(user_id)
+    await db.refresh(db_user)
     return db_user
 
 @router.delete("/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if db_user is None:
-        raise HTTPException(status_code=404, detail="User not found")
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    user_tests = select(Test.id).where(Test.user_id == user_id)
+    user_forms = select(Form.id).where(Form.user_id == user_id)
 
-    db_doctor = db.query(Doctor).filter(Doctor.user_id == user_id).first()
-    if db_doctor:
-        db.delete(db_doctor)
-    
-    db_dependents = db.query(Dependent).filter((Dependent.user_id == user_id) | (Dependent.dependent_id == user_id)).all()
-    for db_dependent in db_dependents:
-        db.delete(db_dependent)
-
-    db_tests = db.query(Test).filter(Test.user_id == user_id).all()
-    for db_test in db_tests:
-        db_derived_health_data = db.query(DerivedHealthData).filter(DerivedHealthData.test_id == db_test.id).all()
-        for db_data in db_derived_health_data:
-            db.delete(db_data)
-        db.delete(db_test)
-
-    db_forms = db.query(Form).filter(Form.user_id == user_id).all()
-    for db_form in db_forms:
-        db_derived_health_data = db.query(DerivedHealthData).filter(DerivedHealthData.form_id == db_form.id).all()
-        for db_data in db_derived_health_data:
-            db.delete(db_data)
-        db.delete(db_form)
-
-    db.delete(db_user)
-    db.commit()
-    return {"ok": True}
+    # Remove as linhas dependentes primeiro (ordem das chaves estrangeiras),
+    # com um DELETE por tabela dentro da mesma transação.
+    statements = [
+        (DerivedHealthData, delete(DerivedHealthData).where(
+            DerivedHealthData.test_id.in_(user_tests) | DerivedHealthData.form_id.in_(user_forms)
+        )),
+        (Test, delete(Test).where(Test.user_id == user_id)),
+        (Form, delete(Form).where(Form.user_id == user_id)),
+        (Dependent, delete(Dependent).where((Dependent.user_id == user_id) | (Dependent.dependent_id == user_id))),
+        (Doctor, delete(Doctor).where(Doctor.user_id == user_id)),
+        (User, delete(User).where(User.id == user_id)),
+    ]
 
-@router.get("/with-doctor/{user_id}", response_model=UserWithDoctorSchema)
-def get_user_with_doctor(user_id: int, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if db_user is None:
-        raise HTTPException(status_code=404, detail="User not found")
+    deleted = {}
+    for model, statement in statements:
+        result = await db.execute(statement.execution_options(synchronize_session=False))
+        deleted[model.__tablename__] = result.rowcount
 
-    db_doctor = db.query(Doctor).filter(Doctor.user_id == user_id).first()
-    user_data = db_user.__dict__
-    if db_doctor:
-        user_data["doctor"] = db_doctor
+    if deleted[User.__tablename__] == 0:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="User not found")
 
-    return user_data
+    await db.commit()
+    await user_cache.invalidate_user(user_id)
+    return {"ok": True, "deleted": deleted}
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from datetime import date
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 class DependentBase(BaseModel):
@@ -11,12 +12,29 @@ class DependentCreate(DependentBase):
 class Dependent(DependentBase):
     user_id: int
     user_full_name: Optional[str]
-    user_birth_date: Optional[str]
+    user_birth_date: Optional[date]
     user_email: Optional[str]
     form_status: Optional[str]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class DependentBulkResult(BaseModel):
+    index: int
+    user_id: int
+    dependent_id: int
+    ok: bool
+    detail: Optional[str] = None
 
 class ConfirmDependentBody(BaseModel):
     email: str
+
+class ConfirmDependentVerify(BaseModel):
+    token: str
+    # Obrigatórios só para tokens antigos, que não trazem os ids
+    user_id: Optional[int] = None
+    dependent_id: Optional[int] = None
+
+class DependentConfirmation(BaseModel):
+    user_id: int
+    dependent_id: int
+    confirmed: bool
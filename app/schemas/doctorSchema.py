@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class DoctorBase(BaseModel):
     crm: str = Field(..., max_length=50)
@@ -10,5 +10,4 @@ class DoctorCreate(DoctorBase):
 class Doctor(DoctorBase):
     user_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,16 @@
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+class MetricStatistics(BaseModel):
+    count: int
+    mean: Optional[float] = None
+    p25: Optional[float] = None
+    p50: Optional[float] = None
+    p75: Optional[float] = None
+    p95: Optional[float] = None
+
+class CohortStatistics(BaseModel):
+    biological_sex: str
+    age_band: str
+    forms: int
+    metrics: Dict[str, MetricStatistics]
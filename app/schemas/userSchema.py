@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 
 class UserBase(BaseModel):
     full_name: Optional[str] = Field(None, max_length=255)
@@ -11,12 +11,37 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str = Field(..., min_length=6)
 
+class UserImport(BaseModel):
+    full_name: str = Field(..., max_length=255)
+    email: EmailStr
+    birth_date: date
+    biological_sex: str = Field(..., max_length=1, pattern='^(M|F)$')
+    password: str = Field(..., min_length=6)
+
 class UserUpdate(BaseModel):
     full_name: Optional[str] = Field(None, max_length=255)
     email: Optional[EmailStr] = None
     birth_date: Optional[date] = None
     biological_sex: Optional[str] = Field(None, max_length=1, pattern='^(M|F)$')
 
+class UserBulkUpdate(UserUpdate):
+    id: int
+
+class UserBulkError(BaseModel):
+    line: int
+    detail: str
+
+class UserBulkImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: List[UserBulkError]
+
+class UserBulkUpdateResult(BaseModel):
+    index: int
+    id: int
+    ok: bool
+    detail: Optional[str] = None
+
 
 class User(BaseModel):
     id: int
@@ -27,8 +52,7 @@ class User(BaseModel):
     creation_date: datetime
     password: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserUpdatePassword(BaseModel):
     old_password: str = Field(..., min_length=6)
@@ -41,12 +65,9 @@ class DoctorBase(BaseModel):
 class Doctor(DoctorBase):
     user_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserWithDoctor(User):
     doctor: Optional[Doctor] = None
 
-    class Config:
-        orm_mode = True
-        arbitrary_types_allowed = True
+    model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True)
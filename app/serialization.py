@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Mapping, Optional
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter de uma lista de TypedDict com os mesmos campos e tipos do esquema.
+
+    Serializar dicts por um TypedDict mantém as regras de saída do pydantic
+    (datas em ISO 8601 etc.) sem instanciar um modelo por linha.
+    """
+    fields = {name: field.annotation for name, field in schema.model_fields.items()}
+    return TypeAdapter(List[TypedDict(f"{schema.__name__}Row", fields)])
+
+def _values(item: Any, fields: tuple) -> dict:
+    if isinstance(item, Mapping):
+        return {name: item[name] for name in fields}
+    return {name: getattr(item, name) for name in fields}
+
+def dump_list(schema: type[BaseModel], items: Iterable[Any]) -> bytes:
+    """Serializa linhas do banco (mappings ou objetos ORM) para JSON numa única chamada ao pydantic-core.
+
+    As linhas vêm do banco e não são revalidadas: validar o EmailStr de cada
+    usuário custava mais que todo o resto da resposta.
+    """
+    fields = tuple(schema.model_fields)
+    return list_adapter(schema).dump_json([_values(item, fields) for item in items])
+
+def list_response(schema: type[BaseModel], items: Iterable[Any], headers: Optional[Mapping[str, str]] = None) -> Response:
+    # Devolver um Response pula a segunda validação/serialização que o FastAPI
+    # faria com o response_model; o decorator continua documentando o esquema.
+    return Response(dump_list(schema, items), media_type="application/json", headers=headers)
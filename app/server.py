@@ -0,0 +1,117 @@
+"""Perfil de produção: gunicorn gerenciando workers uvicorn.
+
+    gunicorn -c python:app.server app.main:app
+
+O master importa a aplicação uma vez (preload_app) e cada worker herda o
+código já carregado; engines e pools do banco são criados por worker, depois
+do fork. SIGTERM drena as conexões abertas por até GRACEFUL_TIMEOUT segundos
+antes de o master matar o worker. Para desenvolvimento continue usando
+`uvicorn app.main:app --reload`.
+"""
+import glob
+import os
+import shutil
+import tempfile
+
+def _cpu_count() -> int:
+    # Respeita o affinity/cpuset do container quando disponível
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def _default_workers() -> int:
+    # Backends em memória valem por processo (ver check_shared_backends): sem
+    # WEB_CONCURRENCY explícito a imagem sobe com um worker em vez de recusar.
+    # Lê o ambiente direto, com os mesmos padrões de app.cache/tokens/ratelimit,
+    # porque importá-los aqui carregaria prometheus_client antes do diretório
+    # multiprocesso abaixo.
+    cache_backend = os.getenv("CACHE_BACKEND", "memory")
+    backends = (cache_backend, os.getenv("USED_TOKEN_BACKEND", cache_backend), os.getenv("RATE_LIMIT_BACKEND", cache_backend))
+    return 1 if "memory" in backends else _cpu_count()
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY") or _default_workers())
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# Acima do idle timeout do balanceador (60 s no ALB/nginx), senão ele reutiliza
+# conexões que o worker já fechou e devolve 502
+KEEPALIVE_SECONDS = int(os.getenv("KEEPALIVE_SECONDS", "75"))
+
+# Com vários workers cada scrape de /metrics cairia num processo diferente;
+# o diretório compartilhado deixa app.metrics agregar todos. Precisa estar no
+# ambiente antes de o preload importar prometheus_client (--workers na linha
+# de comando só é conhecido depois, então vale para qualquer número de workers).
+_owned_multiproc_dir = None
+if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    _owned_multiproc_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+
+from uvicorn.workers import UvicornWorker
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        # Cancela o que sobrar um pouco antes do SIGKILL do master, para que o
+        # lifespan ainda pare o dispatcher e feche os pools
+        "timeout_graceful_shutdown": max(1, GRACEFUL_TIMEOUT - 5),
+    }
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8002')}"
+workers = WEB_CONCURRENCY
+worker_class = "app.server.Worker"
+preload_app = True
+graceful_timeout = GRACEFUL_TIMEOUT
+keepalive = KEEPALIVE_SECONDS
+# Em workers assíncronos é só o intervalo de heartbeat; requisições lentas não são interrompidas
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+backlog = int(os.getenv("BACKLOG", "2048"))
+# Reciclar workers de tempos em tempos (0 desativa); o jitter evita que todos reiniciem juntos
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "0"))
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+accesslog = os.getenv("ACCESS_LOG") or None
+# Com mais de um worker, backends em memória ficam um por processo: o limite de
+# confirmação vale N vezes e um token usado num worker é aceito em outro. Só
+# para testes de carga ou ambientes sem Redis.
+ALLOW_MEMORY_BACKENDS = os.getenv("ALLOW_MEMORY_BACKENDS", "false").strip().lower() in ("1", "true", "yes", "on")
+
+def memory_backends() -> list:
+    """Variáveis de backend que resolvem para memória do processo."""
+    from app import cache, ratelimit, tokens
+    backends = {
+        "CACHE_BACKEND": cache.CACHE_BACKEND,
+        "USED_TOKEN_BACKEND": tokens.USED_TOKEN_BACKEND,
+        "RATE_LIMIT_BACKEND": ratelimit.RATE_LIMIT_BACKEND,
+    }
+    return [name for name, backend in backends.items() if backend == "memory"]
+
+def check_shared_backends(server):
+    # --workers da linha de comando só é conhecido aqui, em server.cfg
+    per_process = memory_backends() if server.cfg.workers > 1 else []
+    if not per_process:
+        return
+    message = (f"{server.cfg.workers} workers com {', '.join(per_process)}=memory: cada worker teria o seu. "
+               "Use redis (CACHE_BACKEND=redis vale para os demais por padrão) ou ALLOW_MEMORY_BACKENDS=true.")
+    if not ALLOW_MEMORY_BACKENDS:
+        raise RuntimeError(message)
+    server.log.warning(message)
+
+def on_starting(server):
+    check_shared_backends(server)
+    # Arquivos de uma execução anterior somariam contadores de processos que já não existem
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+            os.remove(path)
+
+def post_fork(server, worker):
+    from app import database
+    # O preload roda no master; qualquer engine criado lá não pode ser compartilhado
+    database.reset_engines()
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+def on_exit(server):
+    if _owned_multiproc_dir:
+        shutil.rmtree(_owned_multiproc_dir, ignore_errors=True)
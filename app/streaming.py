@@ -0,0 +1,23 @@
+import os
+from typing import Callable, Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+def ndjson_response(db: AsyncSession, statement, schema: type[BaseModel], transform: Optional[Callable[[dict], dict]] = None) -> StreamingResponse:
+    # A sessão de get_db já foi liberada quando o corpo começa a ser enviado,
+    # então o gerador reutiliza a mesma sessão e a fecha ao terminar.
+    async def generate():
+        try:
+            result = await db.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for row in result.mappings():
+                data = dict(row)
+                if transform is not None:
+                    data = transform(data)
+                yield schema.model_validate(data).model_dump_json() + "\n"
+        finally:
+            await db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -0,0 +1,157 @@
+import base64
+import binascii
+import hashlib
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+import jwt
+from jwt.algorithms import get_default_algorithms
+from app.cache import CACHE_BACKEND, CACHE_PREFIX, REDIS_URL
+from app.config import get_settings
+
+CONFIRMATION_TOKEN_TTL_SECONDS = int(os.getenv("CONFIRMATION_TOKEN_TTL_SECONDS", str(24 * 3600)))
+USED_TOKEN_BACKEND = os.getenv("USED_TOKEN_BACKEND", CACHE_BACKEND)
+USED_TOKEN_MAX_ENTRIES = int(os.getenv("USED_TOKEN_MAX_ENTRIES", "100000"))
+
+CONFIRMATION_SUBJECT = "dependent-confirmation"
+
+class InvalidToken(Exception):
+    pass
+
+@dataclass
+class SigningKeys:
+    algorithm: str
+    signing_key: object
+    verifying_key: object
+
+@lru_cache(maxsize=None)
+def signing_keys() -> SigningKeys:
+    """Chaves preparadas uma única vez por processo (no RS*/ES*, o parse do PEM é o passo caro)."""
+    settings = get_settings()
+    settings.require("secret_key", "algorithm")
+    algorithm = get_default_algorithms().get(settings.algorithm)
+    if algorithm is None:
+        raise ValueError(f"Unsupported ALGORITHM '{settings.algorithm}'")
+    signing_key = algorithm.prepare_key(settings.secret_key)
+    # Algoritmos assimétricos verificam com a chave pública; HMAC usa o mesmo segredo
+    verifying_key = signing_key.public_key() if hasattr(signing_key, "public_key") else signing_key
+    return SigningKeys(settings.algorithm, signing_key, verifying_key)
+
+@dataclass
+class ConfirmationClaims:
+    user_id: Optional[int]
+    dependent_id: Optional[int]
+    email: str
+    token_id: str
+    expires_at: float
+
+def issue_confirmation_token(user_id: int, dependent_id: int, email: str) -> str:
+    keys = signing_keys()
+    now = int(time.time())
+    claims = {
+        "sub": CONFIRMATION_SUBJECT,
+        "uid": user_id,
+        "did": dependent_id,
+        "email": email,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + CONFIRMATION_TOKEN_TTL_SECONDS,
+    }
+    # O JWT já é seguro para URLs; não precisa de outra camada de base64
+    return jwt.encode(claims, keys.signing_key, algorithm=keys.algorithm)
+
+def _decode_legacy(token: str, keys: SigningKeys) -> ConfirmationClaims:
+    """Tokens antigos: JWT sem exp, embrulhado em base64 e com a validade numa string."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        payload = jwt.decode(raw, keys.verifying_key, algorithms=[keys.algorithm])
+        expires = datetime.fromisoformat(payload["expires"])
+        email = payload["email"]
+    except (binascii.Error, UnicodeDecodeError, jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+        raise InvalidToken("Invalid token")
+    # A validade foi gravada em UTC sem fuso
+    if expires < datetime.utcnow():
+        raise InvalidToken("Token expired")
+    token_id = hashlib.sha256(token.encode()).hexdigest()
+    return ConfirmationClaims(None, None, email, token_id, expires.replace(tzinfo=timezone.utc).timestamp())
+
+def verify_confirmation_token(token: str) -> ConfirmationClaims:
+    keys = signing_keys()
+    if token.count(".") != 2:
+        return _decode_legacy(token, keys)
+    try:
+        payload = jwt.decode(
+            token, keys.verifying_key, algorithms=[keys.algorithm],
+            options={"require": ["exp", "jti", "sub"]},
+        )
+    except jwt.ExpiredSignatureError:
+        raise InvalidToken("Token expired")
+    except jwt.InvalidTokenError:
+        raise InvalidToken("Invalid token")
+    if payload["sub"] != CONFIRMATION_SUBJECT:
+        raise InvalidToken("Invalid token")
+    return ConfirmationClaims(payload.get("uid"), payload.get("did"), payload.get("email"), payload["jti"], payload["exp"])
+
+class MemoryUsedTokens:
+    """Ids de tokens já consumidos, guardados até expirarem (depois disso o próprio token é recusado)."""
+
+    def __init__(self, max_entries: int = USED_TOKEN_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+    def _evict(self, now: float):
+        # Com TTL fixo, a ordem de inserção é aproximadamente a ordem de expiração
+        while self._entries:
+            token_id, expires_at = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    async def consume(self, token_id: str, expires_at: float) -> bool:
+        now = time.time()
+        stored = self._entries.get(token_id)
+        if stored is not None and stored > now:
+            return False
+        self._entries[token_id] = expires_at
+        self._evict(now)
+        return True
+
+    async def release(self, token_id: str):
+        self._entries.pop(token_id, None)
+
+    async def clear(self):
+        self._entries.clear()
+
+class RedisUsedTokens:
+    """Mesma interface, compartilhada entre processos com SET NX e expiração no Redis."""
+
+    def __init__(self, client, prefix: str = CACHE_PREFIX + "used-token:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def consume(self, token_id: str, expires_at: float) -> bool:
+        ttl_ms = max(1, int((expires_at - time.time()) * 1000))
+        return bool(await self.client.set(self.prefix + token_id, 1, px=ttl_ms, nx=True))
+
+    async def release(self, token_id: str):
+        await self.client.delete(self.prefix + token_id)
+
+    async def clear(self):
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+def build_used_tokens(name: str = USED_TOKEN_BACKEND):
+    if name == "memory":
+        return MemoryUsedTokens()
+    if name == "redis":
+        import redis.asyncio
+        return RedisUsedTokens(redis.asyncio.from_url(REDIS_URL))
+    raise ValueError(f"USED_TOKEN_BACKEND inválido: '{name}'. Use 'memory' ou 'redis'.")
+
+used_tokens = build_used_tokens()
@@ -1,34 +1,56 @@
-import requests
 import os
-from fastapi import HTTPException
+from typing import List
+from app import cipher, hashing
 
 def verify_password(plain_password: str, decrypted_password: str) -> bool:
     return plain_password == decrypted_password
 
-def decrypt_password(encrypted_password: str) -> str:
-    url = os.getenv("URL_DECRYPT")
-    private_key = os.getenv("PRIVATE_KEY")
-    data = {
+def _decrypt_payload(encrypted_password: str) -> dict:
+    return {
         "message": encrypted_password,
-        "private_key": private_key,
+        "private_key": os.getenv("PRIVATE_KEY"),
     }
-    response = requests.post(url, json=data)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=500, detail="Error decrypting password")
-    
-    return response.json()["decrypted_message"]
 
-def encrypt_password(password: str) -> str:
-    url = os.getenv("URL_CYPHER")
-    public_key = os.getenv("PUBLIC_KEY")
-    data = {
+def _encrypt_payload(password: str) -> dict:
+    return {
         "message": password,
-        "public_key": public_key,
+        "public_key": os.getenv("PUBLIC_KEY"),
     }
-    response = requests.post(url, json=data)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=500, detail="Error encrypting password")
-    
-    return response.json()["encrypted_message"]
+
+def decrypt_password(encrypted_password: str) -> str:
+    data = cipher.client.post(os.getenv("URL_DECRYPT"), _decrypt_payload(encrypted_password), "Error decrypting password")
+    return data["decrypted_message"]
+
+def encrypt_password(password: str) -> str:
+    data = cipher.client.post(os.getenv("URL_CYPHER"), _encrypt_payload(password), "Error encrypting password")
+    return data["encrypted_message"]
+
+async def decrypt_password_async(encrypted_password: str) -> str:
+    data = await cipher.client.apost(os.getenv("URL_DECRYPT"), _decrypt_payload(encrypted_password), "Error decrypting password")
+    return data["decrypted_message"]
+
+async def encrypt_password_async(password: str) -> str:
+    data = await cipher.client.apost(os.getenv("URL_CYPHER"), _encrypt_payload(password), "Error encrypting password")
+    return data["encrypted_message"]
+
+async def decrypt_passwords(encrypted_passwords: List[str]) -> List[str]:
+    payloads = [_decrypt_payload(encrypted_password) for encrypted_password in encrypted_passwords]
+    results = await cipher.client.apost_many(os.getenv("URL_DECRYPT"), payloads, "Error decrypting password")
+    return [data["decrypted_message"] for data in results]
+
+async def encrypt_passwords(passwords: List[str]) -> List[str]:
+    payloads = [_encrypt_payload(password) for password in passwords]
+    results = await cipher.client.apost_many(os.getenv("URL_CYPHER"), payloads, "Error encrypting password")
+    return [data["encrypted_message"] for data in results]
+
+async def check_user_password(db_user, password: str) -> bool:
+    # Senhas ainda criptografadas pelo serviço externo (ou com hash de custo
+    # antigo) são migradas para o hash local assim que a senha é confirmada.
+    if hashing.is_hashed(db_user.password):
+        valid, new_hash = await hashing.verify_and_update_async(password, db_user.password)
+    else:
+        valid = verify_password(password, await decrypt_password_async(db_user.password))
+        new_hash = await hashing.hash_password_async(password) if valid else None
+    if valid and new_hash:
+        db_user.password = new_hash
+    return valid
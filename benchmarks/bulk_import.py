@@ -0,0 +1,101 @@
+"""Mede a vazão da importação em lote de usuários (POST /user/users/bulk).
+
+Por padrão usa um SQLite temporário; passe --database-url para medir contra
+o Postgres (as linhas criadas são removidas ao final).
+
+Uso:
+    python -m benchmarks.bulk_import --rows 10000 100000 --format jsonl --rounds 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+
+def generate_body(rows: int, fmt: str, prefix: str):
+    if fmt == "csv":
+        yield b"full_name,email,birth_date,biological_sex,password\n"
+    for i in range(rows):
+        row = {
+            "full_name": f"Bench User {i}",
+            "email": f"{prefix}{i}@example.com",
+            "birth_date": "1990-01-01",
+            "biological_sex": "MF"[i % 2],
+            "password": f"password-{i}",
+        }
+        if fmt == "csv":
+            yield (",".join(row.values()) + "\n").encode()
+        else:
+            yield (json.dumps(row) + "\n").encode()
+
+async def run_import(app, rows: int, fmt: str, prefix: str) -> dict:
+    import httpx
+
+    async def body():
+        for line in generate_body(rows, fmt, prefix):
+            yield line
+
+    content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        started = time.perf_counter()
+        response = await client.post("/user/users/bulk", content=body(), headers={"Content-Type": content_type})
+        elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    result = response.json()
+    return {
+        "rows": rows,
+        "created": result["created"],
+        "failed": result["failed"],
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--rounds", type=int, default=4, help="custo do bcrypt durante a medição")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        args.database_url = f"sqlite:///{os.path.join(tmpdir.name, 'bulk_import.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+
+    from app import database, hashing
+    from app.bulk import BULK_CHUNK_SIZE
+    from app.main import app
+    from app.models.userModel import User
+
+    database.Base.metadata.create_all(bind=database.engine)
+    hashing.context = hashing.build_context(bcrypt_rounds=args.rounds)
+
+    prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+    results = []
+    try:
+        for index, rows in enumerate(args.rows):
+            results.append(asyncio.run(run_import(app, rows, args.format, f"{prefix}{index}-")))
+    finally:
+        with database.SessionLocal() as db:
+            db.query(User).filter(User.email.like(f"{prefix}%")).delete(synchronize_session=False)
+            db.commit()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    print(json.dumps({
+        "database": database.engine.url.get_backend_name(),
+        "format": args.format,
+        "bcrypt_rounds": args.rounds,
+        "chunk_size": BULK_CHUNK_SIZE,
+        "hash_workers": hashing.PASSWORD_HASH_WORKERS,
+        "results": results,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
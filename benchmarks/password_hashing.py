@@ -0,0 +1,50 @@
+"""Mede quantas verificações de senha por segundo o hash local sustenta.
+
+Uso:
+    python -m benchmarks.password_hashing --rounds 12 --seconds 5 --threads 4
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app import hashing
+
+def run_verifications(context, stored_hash: str, seconds: float) -> int:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        context.verify("benchmark-password", stored_hash)
+        count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scheme", default=hashing.PASSWORD_SCHEMES[0])
+    parser.add_argument("--rounds", type=int, default=hashing.PASSWORD_BCRYPT_ROUNDS)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    context = hashing.build_context(schemes=[args.scheme], bcrypt_rounds=args.rounds)
+    stored_hash = context.hash("benchmark-password")
+
+    single = run_verifications(context, stored_hash, args.seconds) / args.seconds
+
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        futures = [executor.submit(run_verifications, context, stored_hash, args.seconds) for _ in range(args.threads)]
+        total = sum(future.result() for future in futures) / args.seconds
+
+    cores = min(args.threads, os.cpu_count() or 1)
+    print(json.dumps({
+        "scheme": args.scheme,
+        "bcrypt_rounds": args.rounds,
+        "threads": args.threads,
+        "cores": cores,
+        "verifications_per_second_single_thread": round(single, 2),
+        "verifications_per_second_total": round(total, 2),
+        "verifications_per_second_per_core": round(total / cores, 2),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Popula um banco com dados sintéticos para os benchmarks.
+
+Gera usuários, médicos, vínculos de dependentes, formulários, exames e dados
+derivados em lotes (INSERT ... RETURNING com executemany), sem passar pela API.
+Além do conjunto principal, reserva usuários "descartáveis" para os cenários
+destrutivos (DELETE), de modo que cada requisição tenha a sua própria linha.
+
+Uso:
+    python -m benchmarks.seed --database-url sqlite:///./bench.db --users 5000 --reset
+"""
+import argparse
+import json
+import random
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from typing import List, Tuple
+
+PASSWORD = "benchmark-password"
+FORM_STATUSES = ("Not started", "Started", "Completed")
+LAB_FIELDS = (
+    "latest_red_blood_cell", "latest_hemoglobin", "latest_hematocrit", "latest_glycated_hemoglobin",
+    "latest_ast", "latest_alt", "latest_urea", "latest_creatinine",
+)
+
+@dataclass
+class Dataset:
+    users: List[int] = field(default_factory=list)
+    emails: List[str] = field(default_factory=list)
+    doctors: List[int] = field(default_factory=list)
+    # Vínculos (user_id, dependent_id); os confirmados alimentam read_user_dependents
+    links: List[Tuple[int, int]] = field(default_factory=list)
+    confirmed_owners: List[int] = field(default_factory=list)
+    # Usuários com médico, vínculo, formulários e exames, removidos pelos cenários de DELETE
+    disposable: List[int] = field(default_factory=list)
+    disposable_links: List[Tuple[int, int]] = field(default_factory=list)
+    counts: dict = field(default_factory=dict)
+
+    def pairs(self, offset: int) -> List[Tuple[int, int]]:
+        """Pares (usuário, usuário + offset) ainda não vinculados, para cenários de criação."""
+        total = len(self.users)
+        return [(self.users[i], self.users[(i + offset) % total]) for i in range(total)]
+
+def _insert_returning_ids(connection, model, rows: List[dict]) -> List[int]:
+    from sqlalchemy import insert
+    if not rows:
+        return []
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list(connection.execute(statement, rows).scalars())
+
+def _user_rows(count: int, prefix: str, password_hash: str, rng: random.Random) -> List[dict]:
+    return [
+        {
+            "full_name": f"Bench User {prefix}{i}",
+            "email": f"{prefix}{i}@example.com",
+            "password": password_hash,
+            "birth_date": date(1940, 1, 1) + timedelta(days=rng.randrange(0, 365 * 80)),
+            "biological_sex": rng.choice("MF"),
+        }
+        for i in range(count)
+    ]
+
+def _health_rows(connection, user_ids: List[int], forms_per_user: int, tests_per_user: int,
+                 derived_per_form: int, rng: random.Random) -> dict:
+    from app.models.derivedHealthDataModel import DerivedHealthData
+    from app.models.formModel import Form
+    from app.models.testModel import Test
+
+    form_rows, test_rows = [], []
+    for user_id in user_ids:
+        for _ in range(forms_per_user):
+            height = rng.uniform(1.5, 2.0)
+            weight = rng.uniform(45, 120)
+            form_rows.append({
+                "user_id": user_id,
+                "weight": round(weight, 1),
+                "height": round(height, 2),
+                "bmi": round(weight / height ** 2, 1),
+                "abdominal_circumference": round(rng.uniform(60, 130)),
+                "blood_type": rng.choice(("A+", "A-", "B+", "O+", "O-", "AB+")),
+                "form_status": rng.choice(FORM_STATUSES),
+                **{name: round(rng.uniform(0.5, 15), 2) for name in LAB_FIELDS},
+            })
+        for index in range(tests_per_user):
+            test_rows.append({
+                "user_id": user_id,
+                "test_name": f"Exame {index}",
+                "url": f"https://exames.example.com/{user_id}/{index}",
+                "test_date": datetime(2024, 1, 1) + timedelta(days=rng.randrange(0, 365)),
+            })
+
+    form_ids = _insert_returning_ids(connection, Form, form_rows)
+    test_ids = _insert_returning_ids(connection, Test, test_rows)
+
+    # Cada formulário aponta para exames do mesmo usuário
+    tests_by_user = {}
+    for row, test_id in zip(test_rows, test_ids):
+        tests_by_user.setdefault(row["user_id"], []).append(test_id)
+    derived_rows = []
+    for row, form_id in zip(form_rows, form_ids):
+        user_tests = tests_by_user.get(row["user_id"])
+        if not user_tests:
+            continue
+        for index in range(derived_per_form):
+            derived_rows.append({
+                "form_id": form_id,
+                "test_id": user_tests[index % len(user_tests)],
+                "name": rng.choice(("bmi", "glicemia", "colesterol", "pressao")),
+                "value": f"{rng.uniform(1, 300):.1f}",
+            })
+    if derived_rows:
+        connection.execute(DerivedHealthData.__table__.insert(), derived_rows)
+    return {"Forms": len(form_rows), "Tests": len(test_rows), "DerivedHealthData": len(derived_rows)}
+
+def seed(engine, users: int = 1000, doctor_ratio: float = 0.2, confirmed_ratio: float = 0.5,
+         forms_per_user: int = 2, tests_per_user: int = 2, derived_per_form: int = 3,
+         disposable: int = 0, bcrypt_rounds: int = 4, prefix: str = "bench-", seed_value: int = 42) -> Dataset:
+    """Insere o conjunto de dados e devolve os ids gerados."""
+    from app import hashing
+    from app.models.dependentModel import Dependent
+    from app.models.doctorModel import Doctor
+    from app.models.userModel import User
+
+    rng = random.Random(seed_value)
+    # Um único hash para todos: o custo do bcrypt não entra na carga dos dados
+    password_hash = hashing.build_context(bcrypt_rounds=bcrypt_rounds).hash(PASSWORD)
+    dataset = Dataset()
+
+    with engine.begin() as connection:
+        user_rows = _user_rows(users, prefix, password_hash, rng)
+        dataset.users = _insert_returning_ids(connection, User, user_rows)
+        dataset.emails = [row["email"] for row in user_rows]
+        dataset.doctors = dataset.users[:int(users * doctor_ratio)]
+
+        disposable_rows = _user_rows(disposable, f"{prefix}disposable-", password_hash, rng)
+        dataset.disposable = _insert_returning_ids(connection, User, disposable_rows)
+
+        doctor_ids = dataset.doctors + dataset.disposable
+        if doctor_ids:
+            connection.execute(Doctor.__table__.insert(), [
+                {"user_id": user_id, "crm": f"CRM-{user_id}", "specialty": rng.choice(("Cardiologia", "Clínica geral", "Pediatria"))}
+                for user_id in doctor_ids
+            ])
+
+        # Cada usuário tem como dependente o próximo da lista (offset 1)
+        link_rows = []
+        if users > 1:
+            for owner, dependent in dataset.pairs(1):
+                confirmed = rng.random() < confirmed_ratio
+                link_rows.append({"user_id": owner, "dependent_id": dependent, "confirmed": confirmed})
+                dataset.links.append((owner, dependent))
+                if confirmed:
+                    dataset.confirmed_owners.append(owner)
+            if dataset.users:
+                dataset.disposable_links = [(user_id, dataset.users[i % users]) for i, user_id in enumerate(dataset.disposable)]
+                link_rows += [{"user_id": owner, "dependent_id": dependent, "confirmed": True}
+                              for owner, dependent in dataset.disposable_links]
+        if link_rows:
+            connection.execute(Dependent.__table__.insert(), link_rows)
+
+        health = _health_rows(connection, dataset.users + dataset.disposable, forms_per_user, tests_per_user,
+                              derived_per_form, rng)
+
+    dataset.counts = {
+        "Users": len(dataset.users) + len(dataset.disposable),
+        "Doctors": len(doctor_ids),
+        "Dependents": len(link_rows),
+        **health,
+    }
+    return dataset
+
+def add_arguments(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("dados sintéticos")
+    group.add_argument("--users", type=int, default=1000)
+    group.add_argument("--doctor-ratio", type=float, default=0.2)
+    group.add_argument("--confirmed-ratio", type=float, default=0.5)
+    group.add_argument("--forms-per-user", type=int, default=2)
+    group.add_argument("--tests-per-user", type=int, default=2)
+    group.add_argument("--derived-per-form", type=int, default=3)
+    group.add_argument("--seed", type=int, default=42, help="semente do gerador aleatório")
+
+def seed_from_args(engine, args, disposable: int, prefix: str) -> Dataset:
+    return seed(
+        engine, users=args.users, doctor_ratio=args.doctor_ratio, confirmed_ratio=args.confirmed_ratio,
+        forms_per_user=args.forms_per_user, tests_per_user=args.tests_per_user,
+        derived_per_form=args.derived_per_form, disposable=disposable, prefix=prefix, seed_value=args.seed,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--reset", action="store_true", help="recria todas as tabelas antes de popular")
+    parser.add_argument("--disposable", type=int, default=0)
+    parser.add_argument("--prefix", default="bench-")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    import os
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    from app import database
+    import app.main  # noqa: F401 - registra todos os modelos no metadata
+
+    if args.reset:
+        database.Base.metadata.drop_all(bind=database.engine)
+    database.Base.metadata.create_all(bind=database.engine)
+    dataset = seed_from_args(database.engine, args, args.disposable, args.prefix)
+    print(json.dumps(asdict(dataset)["counts"], indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Mede o CPU gasto por 1k linhas nas listagens de read_users e read_dependents.
+
+Compara o caminho anterior (entidades ORM devolvidas ao FastAPI, que valida e
+serializa cada linha pelo response_model e codifica com json.dumps) com o
+atual (colunas lidas como mappings e serializadas para bytes num único
+dump_json do pydantic-core, sem revalidação). As duas versões leem as mesmas
+linhas de um SQLite em memória com o engine síncrono, então o número inclui a
+materialização das linhas mas não a latência do banco; para latência ponta a
+ponta use benchmarks.load.
+
+Uso:
+    python -m benchmarks.serialization --rows 1000 --repeat 50
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+def fastapi_render(schema, loop):
+    """O caminho anterior: response_model + JSONResponse."""
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    field = create_response_field(name="Response", type_=List[schema], mode="serialization")
+
+    def render(items) -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=items))
+        return JSONResponse(content).body
+    return render
+
+def legacy_dependent_rows(summaries):
+    # _dependent_row anterior: um modelo por linha, data convertida em Python
+    from app.schemas.dependentSchema import Dependent
+    return [
+        Dependent(user_id=summary.user_id, dependent_id=summary.dependent_id, confirmed=summary.confirmed,
+                  user_full_name=summary.user_full_name,
+                  user_birth_date=summary.user_birth_date.isoformat() if summary.user_birth_date else None,
+                  user_email=summary.user_email, form_status=summary.form_status)
+        for summary in summaries
+    ]
+
+def cpu_ms_per_1k(handler, rows: int, repeat: int) -> float:
+    handler()
+    started = time.process_time()
+    for _ in range(repeat):
+        handler()
+    return (time.process_time() - started) / repeat * 1000 * 1000 / rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.orm import Session
+    from sqlalchemy.pool import StaticPool
+    import app.main  # noqa: F401 - registra todos os modelos no metadata
+    from app.database import Base
+    from app.models.dependentSummaryModel import DependentSummary
+    from app.models.userModel import User
+    from app.schemas.dependentSchema import Dependent
+    from app.schemas.userSchema import User as UserSchema
+    from app.serialization import dump_list
+    from benchmarks import seed
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    seed.seed(engine, users=args.rows, forms_per_user=1, tests_per_user=0, derived_per_form=0)
+
+    loop = asyncio.new_event_loop()
+    render_users, render_dependents = fastapi_render(UserSchema, loop), fastapi_render(Dependent, loop)
+    users_query = select(User).order_by(User.id).limit(args.rows)
+    users_columns = select(*User.__table__.columns).order_by(User.id).limit(args.rows)
+    summaries_query = select(DependentSummary).order_by(DependentSummary.user_id, DependentSummary.dependent_id)
+    summaries_columns = select(*DependentSummary.__table__.columns).order_by(
+        DependentSummary.user_id, DependentSummary.dependent_id
+    )
+
+    def run(statement, render, entities: bool):
+        # Uma sessão por chamada, como uma requisição
+        with Session(engine) as session:
+            result = session.execute(statement)
+            return render(result.scalars().all() if entities else result.mappings().all())
+
+    handlers = {
+        "read_users": (
+            lambda: run(users_query, render_users, True),
+            lambda: run(users_columns, lambda rows: dump_list(UserSchema, rows), False),
+        ),
+        "read_dependents": (
+            lambda: run(summaries_query, lambda rows: render_dependents(legacy_dependent_rows(rows)), True),
+            lambda: run(summaries_columns, lambda rows: dump_list(Dependent, rows), False),
+        ),
+    }
+
+    results = {}
+    for name, (before, after) in handlers.items():
+        # As duas versões precisam gerar o mesmo JSON
+        assert json.loads(before()) == json.loads(after()), name
+        before_ms = cpu_ms_per_1k(before, args.rows, args.repeat)
+        after_ms = cpu_ms_per_1k(after, args.rows, args.repeat)
+        results[name] = {
+            "before_cpu_ms_per_1k_rows": round(before_ms, 3),
+            "after_cpu_ms_per_1k_rows": round(after_ms, 3),
+            "saved_cpu_ms_per_1k_rows": round(before_ms - after_ms, 3),
+            "speedup": round(before_ms / after_ms, 2),
+        }
+    loop.close()
+
+    print(json.dumps({"rows": args.rows, "repeat": args.repeat, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
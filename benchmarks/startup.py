@@ -0,0 +1,87 @@
+"""Mede o tempo de inicialização da aplicação e gera um relatório de tempo de import.
+
+Cada rodada usa um interpretador novo e mede separadamente o `import app.main`
+e o startup do lifespan (engine, warm-up opcional do pool e dispatcher de e-mails).
+Usa as variáveis de ambiente / .env atuais.
+
+Uso:
+    python -m benchmarks.startup --runs 10 --top 15
+    DB_POOL_WARMUP=5 python -m benchmarks.startup
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def startup():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print(json.dumps({"import_seconds": imported - started, "startup_seconds": ready - imported}))
+"""
+
+def run_probe(env: dict) -> dict:
+    output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True, env=env)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def import_profile(env: dict, top: int) -> dict:
+    """Agrupa a saída de `python -X importtime` por pacote de primeiro nível."""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                            capture_output=True, text=True, check=True, env=env)
+    by_package = defaultdict(int)
+    by_module = {}
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, module = [part.strip() for part in line[len("import time:"):].split("|")]
+        if not self_us.isdigit():
+            continue
+        by_package[module.split(".")[0]] += int(self_us)
+        by_module[module] = int(cumulative_us)
+
+    def ms(items):
+        return [{"name": name, "ms": round(us / 1000, 2)} for name, us in sorted(items, key=lambda item: -item[1])[:top]]
+
+    app_modules = [(name, us) for name, us in by_module.items() if name.startswith("app")]
+    return {
+        "total_ms": round(sum(by_package.values()) / 1000, 2),
+        "packages_by_self_time": ms(by_package.items()),
+        "app_modules_by_cumulative_time": ms(app_modules),
+    }
+
+def summarize(values: list) -> dict:
+    return {
+        "median_ms": round(statistics.median(values) * 1000, 2),
+        "min_ms": round(min(values) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    results = [run_probe(env) for _ in range(args.runs)]
+    print(json.dumps({
+        "runs": args.runs,
+        "db_pool_warmup": int(os.getenv("DB_POOL_WARMUP", "0")),
+        "import": summarize([result["import_seconds"] for result in results]),
+        "lifespan_startup": summarize([result["startup_seconds"] for result in results]),
+        "ready": summarize([result["import_seconds"] + result["startup_seconds"] for result in results]),
+        "import_profile": import_profile(env, args.top),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Initial schema
+
+Esquema criado até então por Base.metadata.create_all. Bancos que já existiam
+devem ser marcados com `alembic stamp 0001` antes do primeiro `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 19:24:59.641675
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('EmailOutbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('recipient', sa.String(length=255), nullable=False),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.TIMESTAMP(), nullable=False),
+    sa.Column('last_error', sa.String(length=1024), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=False),
+    sa.Column('sent_at', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_EmailOutbox_id'), 'EmailOutbox', ['id'], unique=False)
+    op.create_table('Users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('full_name', sa.String(length=255), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('password', sa.String(length=2048), nullable=False),
+    sa.Column('birth_date', sa.Date(), nullable=False),
+    sa.Column('biological_sex', sa.String(length=1), nullable=False),
+    sa.Column('creation_date', sa.TIMESTAMP(), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_index(op.f('ix_Users_id'), 'Users', ['id'], unique=False)
+    op.create_table('Dependents',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('dependent_id', sa.Integer(), nullable=False),
+    sa.Column('confirmed', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['dependent_id'], ['Users.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['Users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'dependent_id')
+    )
+    op.create_table('Doctors',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('crm', sa.String(length=50), nullable=False),
+    sa.Column('specialty', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['Users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('Forms',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('weight', sa.String(length=255), nullable=True),
+    sa.Column('height', sa.String(length=255), nullable=True),
+    sa.Column('bmi', sa.String(length=255), nullable=True),
+    sa.Column('blood_type', sa.String(length=255), nullable=True),
+    sa.Column('abdominal_circumference', sa.String(length=255), nullable=True),
+    sa.Column('allergies', sa.String(length=255), nullable=True),
+    sa.Column('diseases', sa.String(length=255), nullable=True),
+    sa.Column('medications', sa.String(length=255), nullable=True),
+    sa.Column('family_history', sa.String(length=255), nullable=True),
+    sa.Column('important_notes', sa.String(length=255), nullable=True),
+    sa.Column('images_reports', sa.String(length=255), nullable=True),
+    sa.Column('form_status', sa.String(length=20), nullable=False),
+    sa.Column('latest_red_blood_cell', sa.String(length=255), nullable=True),
+    sa.Column('latest_hemoglobin', sa.String(length=255), nullable=True),
+    sa.Column('latest_hematocrit', sa.String(length=255), nullable=True),
+    sa.Column('latest_glycated_hemoglobin', sa.String(length=255), nullable=True),
+    sa.Column('latest_ast', sa.String(length=255), nullable=True),
+    sa.Column('latest_alt', sa.String(length=255), nullable=True),
+    sa.Column('latest_urea', sa.String(length=255), nullable=True),
+    sa.Column('latest_creatinine', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['Users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_Forms_id'), 'Forms', ['id'], unique=False)
+    op.create_table('Tests',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('test_name', sa.String(length=255), nullable=False),
+    sa.Column('url', sa.String(length=400), nullable=False),
+    sa.Column('test_date', sa.TIMESTAMP(), nullable=True),
+    sa.Column('submission_date', sa.TIMESTAMP(), server_default='CURRENT_TIMESTAMP', nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['Users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_Tests_id'), 'Tests', ['id'], unique=False)
+    op.create_table('DerivedHealthData',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('form_id', sa.Integer(), nullable=False),
+    sa.Column('test_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('value', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['form_id'], ['Forms.id'], ),
+    sa.ForeignKeyConstraint(['test_id'], ['Tests.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_DerivedHealthData_id'), 'DerivedHealthData', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_DerivedHealthData_id'), table_name='DerivedHealthData')
+    op.drop_table('DerivedHealthData')
+    op.drop_index(op.f('ix_Tests_id'), table_name='Tests')
+    op.drop_table('Tests')
+    op.drop_index(op.f('ix_Forms_id'), table_name='Forms')
+    op.drop_table('Forms')
+    op.drop_table('Doctors')
+    op.drop_table('Dependents')
+    op.drop_index(op.f('ix_Users_id'), table_name='Users')
+    op.drop_table('Users')
+    op.drop_index(op.f('ix_EmailOutbox_id'), table_name='EmailOutbox')
+    op.drop_table('EmailOutbox')
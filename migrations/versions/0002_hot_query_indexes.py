@@ -0,0 +1,48 @@
+"""Hot query indexes
+
+Índices para as colunas usadas nos filtros e junções das rotas. No Postgres
+são criados com CREATE INDEX CONCURRENTLY, fora de transação, para não
+bloquear escritas nas tabelas durante a migração.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 19:40:12.204311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_Dependents_dependent_id', 'Dependents', ['dependent_id'], {}),
+    ('ix_Forms_user_id', 'Forms', ['user_id'], {}),
+    ('ix_Tests_user_id', 'Tests', ['user_id'], {}),
+    ('ix_DerivedHealthData_form_id', 'DerivedHealthData', ['form_id'], {}),
+    ('ix_DerivedHealthData_test_id', 'DerivedHealthData', ['test_id'], {}),
+    ('ix_Dependents_user_id_confirmed', 'Dependents', ['user_id', 'dependent_id'], {
+        'postgresql_where': sa.text('confirmed IS true'),
+        'sqlite_where': sa.text('confirmed IS 1'),
+    }),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True, **options)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,49 @@
+"""Dependent summary table
+
+Cria DependentSummaries (uma linha por vínculo com nome, nascimento, e-mail e
+status do formulário mais recente do dependente), os triggers que a mantêm em
+Dependents, Users e Forms, e faz a carga inicial a partir dos dados existentes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 19:31:29.950307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.models.dependentSummaryModel import DROP_SUMMARY_TRIGGERS, REBUILD, SUMMARY_TRIGGERS
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('DependentSummaries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('dependent_id', sa.Integer(), nullable=False),
+    sa.Column('confirmed', sa.Boolean(), nullable=True),
+    sa.Column('user_full_name', sa.String(length=255), nullable=True),
+    sa.Column('user_birth_date', sa.Date(), nullable=True),
+    sa.Column('user_email', sa.String(length=255), nullable=True),
+    sa.Column('form_status', sa.String(length=20), nullable=True),
+    sa.PrimaryKeyConstraint('user_id', 'dependent_id')
+    )
+    op.create_index(op.f('ix_DependentSummaries_dependent_id'), 'DependentSummaries', ['dependent_id'], unique=False)
+    dialect = op.get_bind().dialect.name
+    for statement in SUMMARY_TRIGGERS[dialect] + REBUILD:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for statement in DROP_SUMMARY_TRIGGERS[op.get_bind().dialect.name]:
+        op.execute(statement)
+    op.drop_index(op.f('ix_DependentSummaries_dependent_id'), table_name='DependentSummaries')
+    op.drop_table('DependentSummaries')
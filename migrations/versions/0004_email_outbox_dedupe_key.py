@@ -0,0 +1,41 @@
+"""Email outbox dedupe key
+
+Adiciona EmailOutbox.dedupe_key, usada para coalescer pedidos repetidos de
+confirmação de dependente em um único envio, com um índice para a consulta
+por janela de tempo e um índice único parcial que garante no máximo um
+e-mail pendente por chave.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 21:05:47.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('EmailOutbox', sa.Column('dedupe_key', sa.String(length=255), nullable=True))
+    op.create_index('ix_EmailOutbox_dedupe_key', 'EmailOutbox', ['dedupe_key', 'created_at'], unique=False)
+    op.create_index(
+        'ix_EmailOutbox_dedupe_key_pending', 'EmailOutbox', ['dedupe_key'], unique=True,
+        postgresql_where=sa.text("status = 'pending'"), sqlite_where=sa.text("status = 'pending'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_EmailOutbox_dedupe_key_pending', table_name='EmailOutbox')
+    op.drop_index('ix_EmailOutbox_dedupe_key', table_name='EmailOutbox')
+    with op.batch_alter_table('EmailOutbox') as batch_op:
+        batch_op.drop_column('dedupe_key')
@@ -0,0 +1,179 @@
+"""Numeric form measurements
+
+Converte peso, altura, IMC, circunferência abdominal e os últimos resultados
+de exames em Forms de texto para FLOAT, no lugar. Os valores são lidos e
+convertidos em Python nos dois bancos, com a mesma regra:
+
+- "70,5", "13.2 g/dL" e "1e5" mantêm o número (unidade no fim é ignorada);
+- "1,234.5", "1.234,5" e "1.234.567" têm separador de milhar: o último
+  separador diferente é o decimal, e um separador repetido é de milhar;
+- textos sem nenhum dígito ("pendente", "-") viram NULL, contados no log;
+- textos com dígitos que não formam um número ("10^6/uL", "1,2,3") fazem a
+  migração falhar, listando coluna, quantidade e exemplos. Corrija-os ou rode
+  `alembic -x null_unparseable=true upgrade head` para gravá-los como NULL.
+
+No Postgres a tabela fica travada para escrita (SHARE ROW EXCLUSIVE) da
+leitura até o fim da migração. No SQLite o batch recria Forms; os triggers
+de DependentSummaries, que consultam a tabela, são removidos antes e
+recriados depois.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 22:14:03.529871
+
+"""
+import logging
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from app.models.dependentSummaryModel import DROP_SUMMARY_TRIGGERS, SUMMARY_TRIGGERS
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    'weight', 'height', 'bmi', 'abdominal_circumference',
+    'latest_red_blood_cell', 'latest_hemoglobin', 'latest_hematocrit', 'latest_glycated_hemoglobin',
+    'latest_ast', 'latest_alt', 'latest_urea', 'latest_creatinine',
+]
+
+# Número (separadores de milhar/decimal e expoente opcionais) seguido de unidade opcional
+MEASUREMENT = re.compile(r'^\s*([-+]?[0-9][0-9.,]*(?:[eE][-+]?[0-9]+)?)\s*([^0-9]*)$')
+DIGIT = re.compile(r'[0-9]')
+
+
+def _grouped(integer: str, separator: str) -> str:
+    # Milhares precisam vir em grupos de três dígitos: "1.234.567", não "1.23.4"
+    if not re.fullmatch(r'[-+]?[0-9]{1,3}(?:%s[0-9]{3})+' % re.escape(separator), integer):
+        raise ValueError(integer)
+    return integer.replace(separator, '')
+
+
+def _normalize(number: str) -> str:
+    mantissa, exponent = re.match(r'^([^eE]*)(.*)$', number).groups()
+    commas, dots = mantissa.count(','), mantissa.count('.')
+    if commas and dots:
+        decimal = ',' if mantissa.rindex(',') > mantissa.rindex('.') else '.'
+        thousands = '.' if decimal == ',' else ','
+        integer, _, fraction = mantissa.rpartition(decimal)
+        if decimal in integer:
+            raise ValueError(number)
+        mantissa = _grouped(integer, thousands) + '.' + fraction
+    elif commas > 1 or dots > 1:
+        mantissa = _grouped(mantissa, ',' if commas else '.')
+    else:
+        mantissa = mantissa.replace(',', '.')
+    return mantissa + exponent
+
+
+def parse_measurement(value: Optional[str]) -> Optional[float]:
+    """Número do texto; None quando não há dígito. ValueError quando há dígitos mas não um número."""
+    if value is None or not DIGIT.search(value):
+        return None
+    match = MEASUREMENT.match(value)
+    if not match:
+        raise ValueError(value)
+    number = float(_normalize(match.group(1)))
+    if not math.isfinite(number):
+        raise ValueError(value)
+    return number
+
+
+def _summary(values: Dict[str, List[str]]) -> str:
+    return '; '.join(
+        f'{column}: {len(found)} (ex.: {", ".join(repr(value) for value in found[:3])})'
+        for column, found in values.items()
+    )
+
+
+def _parse_rows(bind, forms) -> List[dict]:
+    rows, placeholders, unparseable = [], {}, {}
+    for row in bind.execute(sa.select(forms)):
+        values = {'form_id': row.id}
+        for column in COLUMNS:
+            text = getattr(row, column)
+            try:
+                values[column] = parse_measurement(text)
+            except ValueError:
+                values[column] = None
+                unparseable.setdefault(column, []).append(text)
+            else:
+                if values[column] is None and text is not None and text.strip():
+                    placeholders.setdefault(column, []).append(text)
+        rows.append(values)
+
+    if placeholders:
+        logger.warning('Forms: textos sem número gravados como NULL: %s', _summary(placeholders))
+    if unparseable:
+        if context.get_x_argument(as_dictionary=True).get('null_unparseable', '').lower() not in ('1', 'true', 'yes'):
+            raise RuntimeError(
+                f'Forms: valores sem número reconhecível: {_summary(unparseable)}. Corrija-os ou rode com '
+                '"-x null_unparseable=true" para gravá-los como NULL.'
+            )
+        logger.warning('Forms: valores sem número reconhecível gravados como NULL: %s', _summary(unparseable))
+    return rows
+
+
+def _postgresql_alter(clause: str):
+    # Um único ALTER TABLE: o Postgres reescreve a tabela uma vez, não uma por coluna
+    op.execute('ALTER TABLE "Forms" ' + ', '.join(clause.format(column=column) for column in COLUMNS))
+
+
+def _update(bind, forms, rows: List[dict]):
+    # Todas as linhas: o batch do SQLite copia os textos com CAST, que deixaria "70,5" como 70
+    if rows:
+        bind.execute(
+            forms.update().where(forms.c.id == sa.bindparam('form_id')).values(
+                {column: sa.bindparam(column) for column in COLUMNS}
+            ),
+            rows,
+        )
+
+
+def _execute(statements):
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    forms = sa.table('Forms', sa.column('id'), *(sa.column(column) for column in COLUMNS))
+    if bind.dialect.name == 'postgresql':
+        # Outros serviços escrevem em Forms: sem o lock, uma linha gravada entre a
+        # leitura e o ALTER viraria NULL. Leituras continuam liberadas até o ALTER.
+        op.execute('LOCK TABLE "Forms" IN SHARE ROW EXCLUSIVE MODE')
+    # A conversão roda antes de qualquer alteração: se falhar, o esquema fica intacto
+    rows = _parse_rows(bind, forms)
+    if bind.dialect.name == 'postgresql':
+        _postgresql_alter('ALTER COLUMN {column} TYPE double precision USING NULL')
+        _update(bind, forms, rows)
+        return
+    _execute(DROP_SUMMARY_TRIGGERS[bind.dialect.name])
+    with op.batch_alter_table('Forms') as batch_op:
+        for column in COLUMNS:
+            batch_op.alter_column(column, type_=sa.Float(), existing_type=sa.String(length=255), existing_nullable=True)
+    _update(bind, forms, rows)
+    _execute(SUMMARY_TRIGGERS[bind.dialect.name])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        _postgresql_alter('ALTER COLUMN {column} TYPE varchar(255) USING {column}::text')
+        return
+    _execute(DROP_SUMMARY_TRIGGERS[bind.dialect.name])
+    with op.batch_alter_table('Forms') as batch_op:
+        for column in COLUMNS:
+            batch_op.alter_column(column, type_=sa.String(length=255), existing_type=sa.Float(), existing_nullable=True)
+    _execute(SUMMARY_TRIGGERS[bind.dialect.name])
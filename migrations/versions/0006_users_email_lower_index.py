@@ -0,0 +1,38 @@
+"""Users email lower index
+
+Índice de expressão em lower(email), usado pelo pedido de confirmação de
+dependente, que busca o usuário pelo e-mail normalizado em minúsculas. No
+Postgres é criado com CREATE INDEX CONCURRENTLY, fora de transação, para não
+bloquear escritas em Users durante a migração.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 23:41:12.064517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_Users_email_lower', 'Users', [sa.text('lower(email)')], unique=False,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_Users_email_lower', table_name='Users', postgresql_concurrently=True, if_exists=True)